@@ -7,15 +7,43 @@ load_dotenv()
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 QDRANT_URL = os.getenv("QDRANT_URL", "http://localhost:6333")
 QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
+QDRANT_PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "true").lower() == "true"  # gRPC (protobuf) instead of REST/JSON
+QDRANT_GRPC_PORT = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
+REDIS_URL = os.getenv("REDIS_URL")  # Optional: shares caches across workers when set
 
 # Qdrant settings
 COLLECTION_NAME = "codelens_docs"
 VECTOR_SIZE = 384  # for all-MiniLM-L6-v2
+# Optional: path on a persistent volume for full chunk texts (keyed by content hash).
+# Unset keeps full texts in the Qdrant payload, which survives redeploys without a volume.
+TEXT_STORE_DB = os.getenv("TEXT_STORE_DB")
+TEXT_PREVIEW_LENGTH = 300  # Characters of chunk text kept in the Qdrant payload when TEXT_STORE_DB is set
+EMBEDDING_CACHE_DB = os.getenv("EMBEDDING_CACHE_DB", "embedding_cache.db")  # Chunk embeddings, keyed by content hash + model
+QUANTIZATION = os.getenv("QDRANT_QUANTIZATION", "scalar")  # "scalar" (int8), "binary" or "none"
+VECTORS_ON_DISK = os.getenv("QDRANT_VECTORS_ON_DISK", "true").lower() == "true"  # Keep float32 originals on disk (mmap)
 
 # Model settings
 EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "onnx")  # "onnx" (int8 quantized) or "torch"
+EMBEDDING_ONNX_FILE = "onnx/model_qint8_avx512_vnni.onnx"  # Prebuilt int8 export shipped with the model
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "256"))  # Chunks per embed_text call during ingest (independent of upload batch size)
 LLM_MODEL = "llama-3.3-70b-versatile"  # Groq's best model
 
 # Chunking settings (OPTIMIZED)
 CHUNK_SIZE = 800        # Increased from 500 for better context
-CHUNK_OVERLAP = 100     # Increased overlap for continuity
+CHUNK_OVERLAP = 100     # Increased overlap for continuity (fixed strategy only)
+CHUNKING_STRATEGY = os.getenv("CHUNKING_STRATEGY", "recursive")  # "recursive", "semantic" or "fixed"
+SEMANTIC_BREAKPOINT_PERCENTILE = 5  # Break where sentence similarity falls in the lowest N%
+
+# Semantic answer cache settings
+QA_CACHE_COLLECTION = "codelens_qa_cache"
+QA_CACHE_THRESHOLD = 0.95   # Minimum cosine similarity (dot product of normalized vectors) to reuse an answer
+QA_CACHE_TTL = 86400        # Seconds before a cached answer expires (24h)
+EXACT_ANSWER_CACHE_TTL = 3600      # Redis TTL for exact-query answers (1h)
+QUERY_EMBEDDING_CACHE_TTL = 86400  # Redis TTL for query embeddings (24h)
+
+# Scraper settings
+URL_CACHE_DB = os.getenv("URL_CACHE_DB", "url_cache.db")  # ETag / Last-Modified / content hash per URL
+
+# CORS: explicit origins only (comma-separated extras, e.g. the deployed frontend)
+CORS_ORIGINS = [origin.strip() for origin in os.getenv("CORS_ORIGINS", "").split(",") if origin.strip()]
@@ -1,16 +1,32 @@
 from fastapi import FastAPI, BackgroundTasks, HTTPException, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
 from rag_engine.retriever import init_collection, add_document, get_collection_info
-from rag_engine.generator import generate_answer
-from rag_engine.updater import update_from_urls, update_single_url
-from rag_engine.pdf_loader import load_pdf
+from rag_engine.generator import generate_answer, generate_answer_stream
+from rag_engine.answer_cache import init_answer_cache, purge_expired_answers
+from rag_engine.updater import update_from_urls, update_from_urls_async, update_single_url
+from rag_engine.pdf_loader import load_pdf, shutdown_pdf_pool
+from rag_engine.embedder import get_embedder
+from config import CORS_ORIGINS
 from apscheduler.schedulers.background import BackgroundScheduler
 from datetime import datetime
 import tempfile
+import shutil
+import asyncio
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 import os
 
+# Log through a queue so request/ingest threads never block on stdout writes
+_log_queue = queue.Queue(-1)
+_log_listener = QueueListener(_log_queue, logging.StreamHandler())
+logging.basicConfig(level=logging.WARNING, format="%(message)s", handlers=[QueueHandler(_log_queue)])
+# Only our own modules log progress; libraries (httpx, apscheduler, ...) stay at WARNING
+logging.getLogger("rag_engine").setLevel(os.getenv("LOG_LEVEL", "INFO"))
+
 app = FastAPI(title="CodeLens API", version="2.0.0")
 
 # Enable CORS
@@ -21,7 +37,7 @@ app.add_middleware(
         "http://localhost:5173",
         "http://127.0.0.1:3000",
         "http://127.0.0.1:5173",
-        "*"  # Development only
+        *CORS_ORIGINS
     ],
     allow_credentials=True,
     allow_methods=["*"],
@@ -32,6 +48,7 @@ app.add_middleware(
 class QueryRequest(BaseModel):
     query: str
     top_k: int = 3
+    stream: bool = False
 
 class DocumentRequest(BaseModel):
     text: str
@@ -39,6 +56,7 @@ class DocumentRequest(BaseModel):
 
 class URLUpdateRequest(BaseModel):
     urls: List[str]
+    force: bool = False  # Re-ingest even pages that look unchanged
 
 class SingleURLRequest(BaseModel):
     url: str
@@ -67,9 +85,10 @@ PREDEFINED_SOURCES = {
 scheduler = BackgroundScheduler()
 last_update_time = None
 
-def scheduled_update_job():
+def scheduled_update_job(force: bool = False):
     """
     Scheduled job that runs automatically to update documentation.
+    Pass force=True to re-ingest pages even if they look unchanged.
     """
     global last_update_time
     print("\n" + "="*60)
@@ -82,7 +101,10 @@ def scheduled_update_job():
         all_urls.extend(urls)
     
     # Run the update
-    result = update_from_urls(all_urls, batch_delay=2.0)
+    result = update_from_urls(all_urls, force=force)
+    
+    # Expired answers are never served; drop them so the cache doesn't grow forever
+    purge_expired_answers()
     
     last_update_time = datetime.now()
     
@@ -91,6 +113,7 @@ def scheduled_update_job():
     print(f"   Total URLs processed: {result['total_urls']}")
     print(f"   Successful: {result['successful']}")
     print(f"   Failed: {result['failed']}")
+    print(f"   Unchanged (skipped): {result['unchanged']}")
     print(f"   Total chunks added: {result['total_chunks']}")
     print(f"   Next update in 24 hours")
     print("="*60 + "\n")
@@ -102,8 +125,14 @@ def scheduled_update_job():
 @app.on_event("startup")
 async def startup_event():
     """Initialize Qdrant collection and start scheduler."""
+    _log_listener.start()
     print("🚀 Starting CodeLens API...")
     init_collection()
+    init_answer_cache()
+    
+    # Load the embedding model now and run a dummy batch so the first request is warm
+    print("🔥 Warming up embedding model...")
+    get_embedder().embed_text(["warmup"] * 8)
     
     # Start the scheduler
     print("⏰ Starting auto-update scheduler...")
@@ -137,6 +166,8 @@ async def shutdown_event():
     print("🛑 Shutting down scheduler...")
     scheduler.shutdown()
     print("✅ Scheduler stopped")
+    shutdown_pdf_pool()
+    _log_listener.stop()
 
 # ============================================
 # BASIC ENDPOINTS
@@ -169,7 +200,14 @@ def health_check():
 def ask(request: QueryRequest):
     """
     Ask a question and get an AI-generated answer based on the knowledge base.
+    Set "stream": true to receive the answer as server-sent events.
     """
+    if request.stream:
+        return StreamingResponse(
+            generate_answer_stream(request.query, top_k=request.top_k),
+            media_type="text/event-stream"
+        )
+    
     try:
         result = generate_answer(request.query, top_k=request.top_k)
         return result
@@ -199,12 +237,12 @@ def add_doc(request: DocumentRequest):
 # ============================================
 
 @app.post("/update_from_urls")
-def update_urls(request: URLUpdateRequest, background_tasks: BackgroundTasks):
+async def update_urls(request: URLUpdateRequest, background_tasks: BackgroundTasks):
     """
     Scrape content from multiple URLs and add to knowledge base.
     This runs in the background.
     """
-    background_tasks.add_task(update_from_urls, request.urls)
+    background_tasks.add_task(update_from_urls_async, request.urls, force=request.force)
     return {
         "status": "started",
         "message": f"Scraping {len(request.urls)} URLs in background",
@@ -223,10 +261,11 @@ def update_url(request: SingleURLRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/update_predefined/{source}")
-def update_predefined_source(source: str, background_tasks: BackgroundTasks):
+async def update_predefined_source(source: str, background_tasks: BackgroundTasks, force: bool = False):
     """
     Update from predefined documentation sources.
     Available sources: fastapi, langchain, pydantic
+    Pass ?force=true to re-ingest pages even if they look unchanged.
     """
     if source not in PREDEFINED_SOURCES:
         raise HTTPException(
@@ -235,7 +274,7 @@ def update_predefined_source(source: str, background_tasks: BackgroundTasks):
         )
     
     urls = PREDEFINED_SOURCES[source]
-    background_tasks.add_task(update_from_urls, urls)
+    background_tasks.add_task(update_from_urls_async, urls, force=force)
     
     return {
         "status": "started",
@@ -263,23 +302,24 @@ async def upload_pdf(file: UploadFile = File(...)):
     """
     Upload a PDF file and add its content to the knowledge base.
     """
+    tmp_path = None
     try:
-        # Save uploaded file temporarily
+        # Stream the upload to a temp file in 64 KB pieces (off the event loop)
         with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-            content = await file.read()
-            tmp_file.write(content)
             tmp_path = tmp_file.name
+            await asyncio.to_thread(shutil.copyfileobj, file.file, tmp_file, 1 << 16)
         
-        # Process the PDF
-        result = load_pdf(tmp_path)
-        
-        # Clean up temp file
-        os.unlink(tmp_path)
+        # Process the PDF in a worker thread so other requests keep flowing
+        result = await asyncio.to_thread(load_pdf, tmp_path)
         
         return result
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        # Clean up temp file
+        if tmp_path and os.path.exists(tmp_path):
+            os.unlink(tmp_path)
 
 # ============================================
 # COLLECTION INFO
@@ -317,11 +357,12 @@ def get_scheduler_status():
         }
 
 @app.post("/scheduler/trigger_now")
-def trigger_update_now(background_tasks: BackgroundTasks):
+def trigger_update_now(background_tasks: BackgroundTasks, force: bool = False):
     """
     Manually trigger an immediate update (without waiting for schedule).
+    Pass ?force=true to re-ingest pages even if they look unchanged.
     """
-    background_tasks.add_task(scheduled_update_job)
+    background_tasks.add_task(scheduled_update_job, force)
     return {
         "status": "triggered",
         "message": "Manual update started in background"
@@ -0,0 +1,212 @@
+from qdrant_client.http import models
+from qdrant_client.http.models import Distance, VectorParams, PointStruct
+from typing import List, Dict, Optional
+import hashlib
+import json
+import time
+import uuid
+from config import VECTOR_SIZE, QA_CACHE_COLLECTION, QA_CACHE_THRESHOLD, QA_CACHE_TTL, EXACT_ANSWER_CACHE_TTL
+from .retriever import qdrant_client
+from .redis_cache import get_redis
+
+# Every lookup filters on these fields
+ANSWER_CACHE_INDEXES = {
+    "ts": models.PayloadSchemaType.FLOAT,
+    "top_k": models.PayloadSchemaType.INTEGER
+}
+
+def _create_answer_cache_indexes(existing: Optional[Dict] = None):
+    """
+    Create indexes for the filtered payload fields that don't have one yet.
+    """
+    for field_name, field_schema in ANSWER_CACHE_INDEXES.items():
+        if existing and field_name in existing:
+            continue
+        qdrant_client.create_payload_index(
+            collection_name=QA_CACHE_COLLECTION,
+            field_name=field_name,
+            field_schema=field_schema
+        )
+        print(f"✅ Indexed answer cache field '{field_name}'")
+
+def init_answer_cache():
+    """
+    Initialize or create the Qdrant collection used as a semantic answer cache.
+    """
+    try:
+        collections = qdrant_client.get_collections().collections
+        collection_names = [c.name for c in collections]
+        
+        if QA_CACHE_COLLECTION in collection_names:
+            print(f"✅ Collection '{QA_CACHE_COLLECTION}' already exists")
+            _create_answer_cache_indexes(qdrant_client.get_collection(QA_CACHE_COLLECTION).payload_schema)
+            return
+        
+        qdrant_client.create_collection(
+            collection_name=QA_CACHE_COLLECTION,
+            vectors_config=VectorParams(
+                size=VECTOR_SIZE,
+                distance=Distance.DOT  # Vectors are unit-normalized, so DOT == cosine
+            )
+        )
+        _create_answer_cache_indexes()
+        print(f"✅ Created collection '{QA_CACHE_COLLECTION}'")
+        
+    except Exception as e:
+        print(f"❌ Error initializing answer cache: {e}")
+        raise
+
+def _exact_key(query: str, top_k: int) -> str:
+    """
+    Redis key for an exact query string and retrieval depth.
+    """
+    return f"answer:{top_k}:" + hashlib.sha1(query.encode()).hexdigest()
+
+def lookup_answer(query_vector: List[float], query: str, top_k: int) -> Optional[Dict]:
+    """
+    Find a previously generated answer for the same or a semantically similar query.
+    
+    Checks Redis for an exact match first, then Qdrant for a fuzzy one.
+    
+    Args:
+        query_vector: Embedding of the incoming query
+        query: Incoming query text
+        top_k: Number of documents the answer is built from (answers are only
+            reused for the same top_k, since it changes the context)
+    
+    Returns:
+        Cached payload (query, answer, sources, top_k, ts) or None on a miss
+    """
+    r = get_redis()
+    if r is not None:
+        try:
+            cached = r.get(_exact_key(query, top_k))
+            if cached is not None:
+                return json.loads(cached)
+        except Exception as e:
+            print(f"⚠️ Redis answer lookup failed: {e}")
+    
+    try:
+        hits = qdrant_client.query_points(
+            collection_name=QA_CACHE_COLLECTION,
+            query=query_vector,
+            query_filter=models.Filter(
+                must=[
+                    models.FieldCondition(
+                        key="ts",
+                        range=models.Range(gt=time.time() - QA_CACHE_TTL)
+                    ),
+                    models.FieldCondition(
+                        key="top_k",
+                        match=models.MatchValue(value=top_k)
+                    )
+                ]
+            ),
+            limit=1,
+            score_threshold=QA_CACHE_THRESHOLD,
+            with_payload=True,
+            with_vector=False
+        ).points
+        
+        if not hits:
+            return None
+        
+        return hits[0].payload
+        
+    except Exception as e:
+        # A broken cache should never break answering
+        print(f"⚠️ Answer cache lookup failed: {e}")
+        return None
+
+def store_answer(query_vector: List[float], query: str, top_k: int, answer: str, sources: List[Dict]):
+    """
+    Store a generated answer so similar future queries can reuse it.
+    
+    Args:
+        query_vector: Embedding of the query
+        query: Original query text
+        top_k: Number of documents the answer was built from
+        answer: Generated answer
+        sources: Sources the answer was based on
+    """
+    payload = {
+        "query": query,
+        "answer": answer,
+        "sources": sources,
+        "top_k": top_k,
+        "ts": time.time()
+    }
+    
+    r = get_redis()
+    if r is not None:
+        try:
+            r.setex(_exact_key(query, top_k), EXACT_ANSWER_CACHE_TTL, json.dumps(payload))
+        except Exception as e:
+            print(f"⚠️ Redis answer store failed: {e}")
+    
+    try:
+        qdrant_client.upsert(
+            collection_name=QA_CACHE_COLLECTION,
+            points=[
+                PointStruct(
+                    id=str(uuid.uuid4()),
+                    vector=query_vector,
+                    payload=payload
+                )
+            ],
+            wait=False
+        )
+    except Exception as e:
+        print(f"⚠️ Answer cache store failed: {e}")
+
+def purge_expired_answers():
+    """
+    Delete cached answers older than QA_CACHE_TTL.
+    
+    Lookups already ignore them; this keeps the collection from growing by one
+    point per unique question forever.
+    """
+    try:
+        qdrant_client.delete(
+            collection_name=QA_CACHE_COLLECTION,
+            points_selector=models.FilterSelector(
+                filter=models.Filter(
+                    must=[
+                        models.FieldCondition(
+                            key="ts",
+                            range=models.Range(lt=time.time() - QA_CACHE_TTL)
+                        )
+                    ]
+                )
+            ),
+            wait=False
+        )
+        print("🧹 Purged expired cached answers")
+    except Exception as e:
+        print(f"⚠️ Answer cache purge failed: {e}")
+
+def invalidate_answers():
+    """
+    Drop every cached answer (Qdrant and Redis).
+    
+    Called whenever the knowledge base changes: an answer built from the old
+    documents (or "the context doesn't contain this") may no longer be right.
+    """
+    try:
+        qdrant_client.delete(
+            collection_name=QA_CACHE_COLLECTION,
+            points_selector=models.FilterSelector(filter=models.Filter()),
+            wait=True
+        )
+        print("🧹 Cleared cached answers (knowledge base changed)")
+    except Exception as e:
+        print(f"⚠️ Answer cache invalidation failed: {e}")
+    
+    r = get_redis()
+    if r is not None:
+        try:
+            keys = list(r.scan_iter("answer:*", count=500))
+            for start in range(0, len(keys), 500):
+                r.unlink(*keys[start:start + 500])
+        except Exception as e:
+            print(f"⚠️ Redis answer invalidation failed: {e}")
@@ -1,5 +1,14 @@
-from typing import List
-from config import CHUNK_SIZE, CHUNK_OVERLAP
+import re
+import numpy as np
+from typing import List, Optional
+from config import CHUNK_SIZE, CHUNK_OVERLAP, CHUNKING_STRATEGY, SEMANTIC_BREAKPOINT_PERCENTILE
+from .embedder import get_embedder
+
+# Sentence boundary: whitespace following ., ! or ?
+_SENT_RE = re.compile(r'(?<=[.!?])\s+')
+
+# Separators tried in order by recursive_split, coarsest first
+DEFAULT_SEPARATORS = ["\n\n", "\n", ". ", " "]
 
 def chunk_text(text: str, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP) -> List[str]:
     """
@@ -13,36 +22,26 @@ def chunk_text(text: str, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVE
     Returns:
         List of text chunks
     """
-    if not text or len(text) == 0:
+    if not text:
         return []
     
-    chunks = []
-    start = 0
-    
-    while start < len(text):
-        end = min(start + chunk_size, len(text))
-        chunk = text[start:end].strip()
-        
-        if chunk:  # Only add non-empty chunks
-            chunks.append(chunk)
-        
-        # Move start position, accounting for overlap
-        start += chunk_size - overlap
-        
-        # Prevent infinite loop if chunk_size <= overlap
-        if chunk_size <= overlap:
-            break
+    n = len(text)
+    step = chunk_size - overlap
     
-    return chunks
+    # Prevent infinite loop if chunk_size <= overlap: only the first window
+    starts = range(0, n, step) if step > 0 else range(0, 1)
+    
+    chunks = [text[start:start + chunk_size].strip() for start in starts]
+    
+    # Only keep non-empty chunks
+    return [chunk for chunk in chunks if chunk]
 
 def chunk_by_sentences(text: str, max_chunk_size: int = CHUNK_SIZE) -> List[str]:
     """
     Alternative chunking method: split by sentences for cleaner chunks.
     """
-    import re
-    
     # Split by sentence boundaries
-    sentences = re.split(r'(?<=[.!?])\s+', text)
+    sentences = _SENT_RE.split(text)
     
     chunks = []
     current_chunk = ""
@@ -60,3 +59,142 @@ def chunk_by_sentences(text: str, max_chunk_size: int = CHUNK_SIZE) -> List[str]
         chunks.append(current_chunk.strip())
     
     return chunks
+
+def recursive_split(text: str, chunk_size: int = CHUNK_SIZE, separators: Optional[List[str]] = None) -> List[str]:
+    """
+    Split text on natural boundaries (paragraphs, lines, sentences, words).
+    
+    Tries the first separator; any piece still larger than chunk_size is split
+    again with the next separator. Neighbouring small pieces are merged back
+    together up to chunk_size, so chunks end on the coarsest boundary possible.
+    
+    Args:
+        text: Input text to chunk
+        chunk_size: Maximum size of each chunk
+        separators: Separators to try in order (defaults to DEFAULT_SEPARATORS)
+    
+    Returns:
+        List of text chunks
+    """
+    if separators is None:
+        separators = DEFAULT_SEPARATORS
+    
+    if len(text) <= chunk_size:
+        text = text.strip()
+        return [text] if text else []
+    
+    # Ran out of separators - fall back to hard character windows
+    if not separators:
+        return chunk_text(text, chunk_size=chunk_size, overlap=0)
+    
+    separator, rest = separators[0], separators[1:]
+    parts = text.split(separator)
+    
+    # Keep the separator attached so sentences keep their punctuation
+    pieces = [part + separator for part in parts[:-1]] + [parts[-1]]
+    
+    chunks = []
+    current = ""
+    
+    for piece in pieces:
+        if len(piece) > chunk_size:
+            if current.strip():
+                chunks.append(current.strip())
+            current = ""
+            chunks.extend(recursive_split(piece, chunk_size, rest))
+        elif len(current) + len(piece) <= chunk_size:
+            current += piece
+        else:
+            if current.strip():
+                chunks.append(current.strip())
+            current = piece
+    
+    # Add the last chunk
+    if current.strip():
+        chunks.append(current.strip())
+    
+    return chunks
+
+def chunk_semantic(
+    text: str,
+    chunk_size: int = CHUNK_SIZE,
+    percentile: float = SEMANTIC_BREAKPOINT_PERCENTILE
+) -> List[str]:
+    """
+    Split text where the topic shifts, using sentence embedding similarity.
+    
+    All sentences are embedded in one batched call; a breakpoint is placed
+    wherever the similarity between neighbouring sentences falls in the lowest
+    `percentile`%. Segments are then merged (or split) to stay near chunk_size.
+    
+    Args:
+        text: Input text to chunk
+        chunk_size: Maximum size of each chunk
+        percentile: Similarity percentile below which a breakpoint is inserted
+    
+    Returns:
+        List of text chunks
+    """
+    sentences = [sentence.strip() for sentence in _SENT_RE.split(text) if sentence.strip()]
+    
+    if len(sentences) < 3:
+        return recursive_split(text, chunk_size)
+    
+    # One batched embedding call - vectors are normalized, so dot == cosine
+    embeddings = get_embedder().embed_array(sentences)
+    similarities = np.einsum("ij,ij->i", embeddings[:-1], embeddings[1:])
+    threshold = np.percentile(similarities, percentile)
+    
+    # Group sentences between breakpoints
+    segments = []
+    current = [sentences[0]]
+    for sentence, similarity in zip(sentences[1:], similarities):
+        if similarity < threshold:
+            segments.append(" ".join(current))
+            current = []
+        current.append(sentence)
+    segments.append(" ".join(current))
+    
+    # Merge small neighbouring segments up to chunk_size; split oversized ones
+    chunks = []
+    current_chunk = ""
+    
+    for segment in segments:
+        if len(segment) > chunk_size:
+            if current_chunk:
+                chunks.append(current_chunk)
+            current_chunk = ""
+            chunks.extend(recursive_split(segment, chunk_size))
+        elif not current_chunk:
+            current_chunk = segment
+        elif len(current_chunk) + 1 + len(segment) <= chunk_size:
+            current_chunk += " " + segment
+        else:
+            chunks.append(current_chunk)
+            current_chunk = segment
+    
+    # Add the last chunk
+    if current_chunk:
+        chunks.append(current_chunk)
+    
+    return chunks
+
+def chunk_document(text: str, strategy: str = CHUNKING_STRATEGY) -> List[str]:
+    """
+    Chunk a document with the configured strategy.
+    
+    Args:
+        text: Input text to chunk
+        strategy: "recursive" (boundary-aware, no overlap), "semantic"
+            (embedding-similarity breakpoints) or "fixed" (overlapping windows)
+    
+    Returns:
+        List of text chunks
+    """
+    if strategy == "fixed":
+        return chunk_text(text)
+    
+    if strategy == "semantic":
+        return chunk_semantic(text)
+    
+    return recursive_split(text)
@@ -1,42 +1,91 @@
 from sentence_transformers import SentenceTransformer
-from typing import List, Union
-from config import EMBEDDING_MODEL, VECTOR_SIZE
+from typing import Dict, List, Tuple, Union
+from functools import lru_cache
+import hashlib
+import os
+import torch
+import numpy as np
+from config import EMBEDDING_MODEL, VECTOR_SIZE, EMBEDDING_BACKEND, EMBEDDING_ONNX_FILE, QUERY_EMBEDDING_CACHE_TTL
+from .redis_cache import get_redis
 
 class Embedder:
     """
     Handles text embedding using Sentence Transformers.
     """
     
-    def __init__(self, model_name: str = EMBEDDING_MODEL):
+    def __init__(self, model_name: str = EMBEDDING_MODEL, backend: str = EMBEDDING_BACKEND):
         """
         Initialize the embedding model.
         
         Args:
             model_name: Name of the sentence transformer model to use
+            backend: "onnx" for the int8-quantized ONNX Runtime model, "torch" for FP32 PyTorch
         """
-        print(f"Loading embedding model: {model_name}...")
-        self.model = SentenceTransformer(model_name)
+        print(f"Loading embedding model: {model_name} ({backend})...")
+        self.model = self._load_model(model_name, backend)
+        self.model_name = model_name
+        
+        # Identifies which vectors this model produces (ONNX int8 and FP32 differ slightly)
+        self.cache_key = f"{model_name}:{getattr(self.model, 'backend', 'torch')}"
         print("✅ Embedding model loaded successfully!")
     
-    def embed_text(self, texts: Union[str, List[str]]) -> List[List[float]]:
+    @staticmethod
+    def _load_model(model_name: str, backend: str) -> SentenceTransformer:
         """
-        Convert text(s) to vector embeddings.
+        Load the model, falling back to PyTorch if ONNX Runtime is unavailable.
+        """
+        if backend == "onnx":
+            try:
+                # int8 dynamic quantization with VNNI kernels; uses CUDA if onnxruntime-gpu is installed
+                return SentenceTransformer(
+                    model_name,
+                    backend="onnx",
+                    model_kwargs={"file_name": EMBEDDING_ONNX_FILE}
+                )
+            except Exception as e:
+                print(f"⚠️ ONNX backend unavailable ({e}), falling back to PyTorch")
+        
+        # Use every core for CPU inference
+        torch.set_num_threads(os.cpu_count() or 1)
+        return SentenceTransformer(model_name)
+    
+    def embed_array(self, texts: Union[str, List[str]]) -> np.ndarray:
+        """
+        Convert text(s) to a single contiguous float32 matrix.
         
         Args:
             texts: Single text string or list of text strings
         
         Returns:
-            List of embedding vectors
+            Array of shape (len(texts), VECTOR_SIZE) with unit-normalized rows
         """
         # Convert single string to list
         if isinstance(texts, str):
             texts = [texts]
         
-        # Generate embeddings
-        embeddings = self.model.encode(texts, show_progress_bar=False)
+        # Generate embeddings (batched forward passes)
+        embeddings = self.model.encode(
+            texts,
+            batch_size=64,
+            show_progress_bar=False,
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        )
+        
+        return np.ascontiguousarray(embeddings, dtype=np.float32)
+    
+    def embed_text(self, texts: Union[str, List[str]]) -> List[List[float]]:
+        """
+        Convert text(s) to vector embeddings.
         
+        Args:
+            texts: Single text string or list of text strings
+        
+        Returns:
+            List of unit-normalized embedding vectors (DOT distance == cosine)
+        """
         # Convert to list format
-        return embeddings.tolist()
+        return self.embed_array(texts).tolist()
     
     def embed_query(self, query: str) -> List[float]:
         """
@@ -48,7 +97,8 @@ class Embedder:
         Returns:
             Single embedding vector
         """
-        return self.embed_text(query)[0]
+        # Repeated queries are served from the LRU cache
+        return list(_cached_embed(query))
 
 # Create a global instance
 _embedder_instance = None
@@ -61,3 +111,56 @@ def get_embedder() -> Embedder:
     if _embedder_instance is None:
         _embedder_instance = Embedder()
     return _embedder_instance
+
+
+@lru_cache(maxsize=4096)
+def _cached_embed(text: str) -> Tuple[float, ...]:
+    """
+    Embed a query string once and memoize the result.
+    
+    Returns a tuple so the cached vector is hashable and can't be mutated by callers.
+    Misses fall through to Redis (shared across workers) before running the model.
+    """
+    embedder = get_embedder()
+    r = get_redis()
+    # Scoped by model + backend: ONNX int8 and FP32 vectors differ, and workers may disagree during a rollout
+    key = f"emb:{embedder.cache_key}:" + hashlib.sha1(text.encode()).hexdigest()
+    
+    if r is not None:
+        try:
+            cached = r.get(key)
+            if cached is not None:
+                return tuple(np.frombuffer(cached, dtype=np.float16).astype(np.float32).tolist())
+        except Exception as e:
+            print(f"⚠️ Redis embedding lookup failed: {e}")
+    
+    vector = embedder.model.encode([text], show_progress_bar=False, normalize_embeddings=True)[0]
+    
+    if r is not None:
+        try:
+            # fp16 halves the bytes stored; precision loss is negligible for retrieval
+            r.setex(key, QUERY_EMBEDDING_CACHE_TTL, np.asarray(vector, dtype=np.float16).tobytes())
+        except Exception as e:
+            print(f"⚠️ Redis embedding store failed: {e}")
+    
+    return tuple(vector.tolist())
+
+def invalidate_query_cache():
+    """
+    Clear all cached query embeddings.
+    """
+    _cached_embed.cache_clear()
+
+def query_cache_info() -> Dict:
+    """
+    Get hit/miss statistics for the query embedding cache.
+    """
+    info = _cached_embed.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "max_size": info.maxsize,
+        "hit_rate": round(info.hits / lookups, 3) if lookups else 0.0
+    }
@@ -0,0 +1,95 @@
+import hashlib
+import sqlite3
+import threading
+import numpy as np
+from typing import List, Optional, Union
+from config import EMBEDDING_CACHE_DB
+
+# Persistent chunk-embedding cache so re-ingesting unchanged text skips the model.
+# Vectors are stored as raw float32 bytes keyed by sha256(text) + model key.
+# The database runs in WAL mode, so every uvicorn worker and the scheduler can
+# share one cache: readers never block, and a chunk embedded by one process is a
+# hit for all the others.
+
+_local = threading.local()
+
+def _connect() -> sqlite3.Connection:
+    """
+    Get this thread's connection to the embedding cache, creating the table if needed.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        # Wait out another process's write instead of failing with "database is locked"
+        conn = sqlite3.connect(EMBEDDING_CACHE_DB, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "text_hash TEXT, model TEXT, vector BLOB, PRIMARY KEY (text_hash, model))"
+        )
+        _local.conn = conn
+    return conn
+
+def _hash(text: str) -> str:
+    """
+    Cache key for a chunk's text.
+    """
+    return hashlib.sha256(text.encode()).hexdigest()
+
+def get_cached_embeddings(texts: List[str], model: str) -> List[Optional[np.ndarray]]:
+    """
+    Look up cached embeddings for texts.
+    
+    Args:
+        texts: Chunk texts
+        model: Embedder cache key (model name + backend)
+    
+    Returns:
+        One entry per text: the cached float32 vector, or None on a miss
+    """
+    if not texts:
+        return []
+    
+    hashes = [_hash(text) for text in texts]
+    found = {}
+    
+    conn = _connect()
+    
+    # Stay under SQLite's bound-parameter limit
+    unique_hashes = list(set(hashes))
+    for start in range(0, len(unique_hashes), 500):
+        batch = unique_hashes[start:start + 500]
+        placeholders = ",".join("?" * len(batch))
+        rows = conn.execute(
+            f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+            [model, *batch]
+        ).fetchall()
+        found.update(rows)
+    
+    return [
+        np.frombuffer(found[h], dtype=np.float32) if h in found else None
+        for h in hashes
+    ]
+
+def store_embeddings(texts: List[str], vectors: Union[np.ndarray, List[List[float]]], model: str):
+    """
+    Save freshly computed embeddings.
+    
+    Args:
+        texts: Chunk texts
+        vectors: Their embeddings (same order)
+        model: Embedder cache key (model name + backend)
+    """
+    if not texts:
+        return
+    
+    conn = _connect()
+    with conn:
+        # Another worker may have embedded the same chunk first; its vector is identical
+        conn.executemany(
+            "INSERT OR IGNORE INTO embeddings (text_hash, model, vector) VALUES (?, ?, ?)",
+            [
+                (_hash(text), model, np.asarray(vector, dtype=np.float32).tobytes())
+                for text, vector in zip(texts, vectors)
+            ]
+        )
@@ -1,11 +1,71 @@
 from groq import Groq
-from typing import List, Dict
+from typing import List, Dict, Iterator, Tuple
+import json
 from config import GROQ_API_KEY, LLM_MODEL
 from .retriever import search_documents
+from .embedder import get_embedder
+from .answer_cache import lookup_answer, store_answer
 
 # Initialize Groq client
 client = Groq(api_key=GROQ_API_KEY)
 
+NO_CONTEXT_ANSWER = "I don't have enough information to answer that question. Please update the knowledge base."
+
+SYSTEM_PROMPT = """You are CodeLens, an expert AI assistant for developers. 
+Your role is to answer questions about developer documentation and frameworks accurately.
+
+Instructions:
+- Use ONLY the provided context to answer questions
+- If the context doesn't contain the answer, say so honestly
+- Be concise but comprehensive
+- Use code examples when relevant
+- Cite sources when possible using [Source N] notation
+- Format your answers with proper markdown when appropriate"""
+
+def build_messages(query: str, search_results: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Build the chat messages and source list from retrieved documents.
+    
+    Args:
+        query: User's question
+        search_results: Results from search_documents
+    
+    Returns:
+        Tuple of (messages for the LLM, sources for the response)
+    """
+    context_parts = []
+    sources = []
+    
+    for i, result in enumerate(search_results, 1):
+        context_parts.append(f"[Source {i}]: {result['text']}")
+        sources.append({
+            "source": result.get("source", "unknown"),
+            "score": float(result.get("score", 0)),
+            "text_preview": result['text'][:200] + "..." if len(result['text']) > 200 else result['text']
+        })
+    
+    context = "\n\n".join(context_parts)
+    
+    user_prompt = f"""Context from documentation:
+{context}
+
+Question: {query}
+
+Answer:"""
+    
+    messages = [
+        {
+            "role": "system",
+            "content": SYSTEM_PROMPT
+        },
+        {
+            "role": "user",
+            "content": user_prompt
+        }
+    ]
+    
+    return messages, sources
+
 def generate_answer(query: str, top_k: int = 3) -> Dict:
     """
     Generate an answer using RAG (Retrieval-Augmented Generation) with Groq.
@@ -18,65 +78,40 @@ def generate_answer(query: str, top_k: int = 3) -> Dict:
         Dictionary with answer and sources
     """
     try:
+        # Step 0: Reuse an answer from a semantically similar past query
+        query_vector = get_embedder().embed_query(query)
+        cached = lookup_answer(query_vector, query, top_k)
+        
+        if cached:
+            print(f"⚡ Answer cache hit for: {cached['query']}")
+            return {
+                "answer": cached["answer"],
+                "sources": cached["sources"],
+                "context_used": True,
+                "model": LLM_MODEL,
+                "cache": "semantic_hit"
+            }
+        
         # Step 1: Retrieve relevant documents
         print(f"🔍 Searching for relevant documents...")
         search_results = search_documents(query, top_k=top_k)
         
         if not search_results:
             return {
-                "answer": "I don't have enough information to answer that question. Please update the knowledge base.",
+                "answer": NO_CONTEXT_ANSWER,
                 "sources": [],
                 "context_used": False
             }
         
-        # Step 2: Build context from retrieved documents
-        context_parts = []
-        sources = []
-        
-        for i, result in enumerate(search_results, 1):
-            context_parts.append(f"[Source {i}]: {result['text']}")
-            sources.append({
-                "source": result.get("source", "unknown"),
-                "score": float(result.get("score", 0)),
-                "text_preview": result['text'][:200] + "..." if len(result['text']) > 200 else result['text']
-            })
-        
-        context = "\n\n".join(context_parts)
+        # Step 2: Build prompt from retrieved documents
+        messages, sources = build_messages(query, search_results)
         print(f"📚 Found {len(search_results)} relevant chunks")
         
-        # Step 3: Create prompt for LLM
-        system_prompt = """You are CodeLens, an expert AI assistant for developers. 
-Your role is to answer questions about developer documentation and frameworks accurately.
-
-Instructions:
-- Use ONLY the provided context to answer questions
-- If the context doesn't contain the answer, say so honestly
-- Be concise but comprehensive
-- Use code examples when relevant
-- Cite sources when possible using [Source N] notation
-- Format your answers with proper markdown when appropriate"""
-
-        user_prompt = f"""Context from documentation:
-{context}
-
-Question: {query}
-
-Answer:"""
-
-        # Step 4: Generate answer using Groq
+        # Step 3: Generate answer using Groq
         print(f"🤖 Generating answer with {LLM_MODEL}...")
         
         chat_completion = client.chat.completions.create(
-            messages=[
-                {
-                    "role": "system",
-                    "content": system_prompt
-                },
-                {
-                    "role": "user",
-                    "content": user_prompt
-                }
-            ],
+            messages=messages,
             model=LLM_MODEL,
             temperature=0.7,
             max_tokens=1024,
@@ -87,6 +122,8 @@ Answer:"""
         answer = chat_completion.choices[0].message.content
         print(f"✅ Answer generated successfully")
         
+        store_answer(query_vector, query, top_k, answer, sources)
+        
         return {
             "answer": answer,
             "sources": sources,
@@ -102,3 +139,87 @@ Answer:"""
             "context_used": False,
             "error": str(e)
         }
+
+def _sse(event: Dict) -> str:
+    """
+    Format a dict as a server-sent event.
+    """
+    return f"data: {json.dumps(event)}\n\n"
+
+def generate_answer_stream(query: str, top_k: int = 3) -> Iterator[str]:
+    """
+    Stream an answer as server-sent events while Groq generates it.
+    
+    Emits {"type": "token", "content": ...} events as text arrives, then a
+    final {"type": "done", "sources": ..., ...} event (or {"type": "error"}).
+    
+    Args:
+        query: User's question
+        top_k: Number of documents to retrieve
+    
+    Yields:
+        SSE-formatted strings
+    """
+    try:
+        # Step 0: Reuse an answer from a semantically similar past query
+        query_vector = get_embedder().embed_query(query)
+        cached = lookup_answer(query_vector, query, top_k)
+        
+        if cached:
+            print(f"⚡ Answer cache hit for: {cached['query']}")
+            yield _sse({"type": "token", "content": cached["answer"]})
+            yield _sse({
+                "type": "done",
+                "sources": cached["sources"],
+                "context_used": True,
+                "model": LLM_MODEL,
+                "cache": "semantic_hit"
+            })
+            return
+        
+        # Step 1: Retrieve relevant documents
+        print(f"🔍 Searching for relevant documents...")
+        search_results = search_documents(query, top_k=top_k)
+        
+        if not search_results:
+            yield _sse({"type": "token", "content": NO_CONTEXT_ANSWER})
+            yield _sse({"type": "done", "sources": [], "context_used": False})
+            return
+        
+        # Step 2: Build prompt from retrieved documents
+        messages, sources = build_messages(query, search_results)
+        print(f"📚 Found {len(search_results)} relevant chunks")
+        
+        # Step 3: Stream answer from Groq
+        print(f"🤖 Streaming answer with {LLM_MODEL}...")
+        
+        stream = client.chat.completions.create(
+            messages=messages,
+            model=LLM_MODEL,
+            temperature=0.7,
+            max_tokens=1024,
+            top_p=1,
+            stream=True
+        )
+        
+        answer_parts = []
+        for chunk in stream:
+            content = chunk.choices[0].delta.content or ""
+            if content:
+                answer_parts.append(content)
+                yield _sse({"type": "token", "content": content})
+        
+        print(f"✅ Answer streamed successfully")
+        
+        store_answer(query_vector, query, top_k, "".join(answer_parts), sources)
+        
+        yield _sse({
+            "type": "done",
+            "sources": sources,
+            "context_used": True,
+            "model": LLM_MODEL
+        })
+        
+    except Exception as e:
+        print(f"❌ Error streaming answer: {e}")
+        yield _sse({"type": "error", "error": str(e)})
@@ -0,0 +1,15 @@
+from PyPDF2 import PdfReader
+from typing import List, Tuple
+
+# Page extraction for the PDF worker processes. Kept apart from pdf_loader so
+# spawned workers only import PyPDF2, not the retriever / embedder stack.
+
+def extract_page_range(args: Tuple[str, int, int]) -> List[str]:
+    """
+    Extract text from pages [start, end) of a PDF (runs in a worker process).
+    
+    PyPDF2 objects aren't picklable, so each worker opens its own reader.
+    """
+    file_path, start, end = args
+    reader = PdfReader(file_path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, end)]
@@ -1,8 +1,67 @@
 from PyPDF2 import PdfReader
-from typing import Dict
+from typing import Dict, List
+from concurrent.futures import ProcessPoolExecutor
 from .retriever import add_document, init_collection
+from .pdf_extract import extract_page_range
+import multiprocessing
+import threading
 import os
 
+# Below this many pages, splitting across processes costs more than it saves
+PARALLEL_PAGE_THRESHOLD = 8
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _get_pool() -> ProcessPoolExecutor:
+    """
+    Get the shared PDF worker pool, starting it on first use.
+    
+    Workers are spawned, not forked: uploads run on a worker thread of a process
+    holding gRPC channels and ONNX/torch thread pools, which aren't fork-safe.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=os.cpu_count() or 1,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+def shutdown_pdf_pool():
+    """
+    Stop the PDF worker processes (called on app shutdown).
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+def extract_pdf_pages(file_path: str, num_pages: int) -> List[str]:
+    """
+    Extract text from every page, spreading pages across CPU cores.
+    
+    Args:
+        file_path: Path to the PDF file
+        num_pages: Number of pages in the PDF
+    
+    Returns:
+        Text of each page, in page order
+    """
+    workers = min(os.cpu_count() or 1, num_pages)
+    
+    if num_pages < PARALLEL_PAGE_THRESHOLD or workers < 2:
+        return extract_page_range((file_path, 0, num_pages))
+    
+    # One contiguous page range per worker so each parses the file only once
+    step = -(-num_pages // workers)
+    ranges = [(file_path, start, min(start + step, num_pages)) for start in range(0, num_pages, step)]
+    
+    page_ranges = _get_pool().map(extract_page_range, ranges)
+    return [text for page_texts in page_ranges for text in page_texts]
+
 def load_pdf(file_path: str) -> Dict:
     """
     Extract text from a PDF file and add to knowledge base.
@@ -31,12 +90,9 @@ def load_pdf(file_path: str) -> Dict:
         print(f"📖 PDF has {num_pages} pages")
         
         # Extract text from all pages
-        text_parts = []
-        for i, page in enumerate(reader.pages, 1):
-            page_text = page.extract_text()
-            if page_text:
-                text_parts.append(page_text)
-                print(f"   Extracted page {i}/{num_pages}")
+        page_texts = extract_pdf_pages(file_path, num_pages)
+        text_parts = [page_text for page_text in page_texts if page_text]
+        print(f"   Extracted text from {len(text_parts)}/{num_pages} pages")
         
         full_text = "\n\n".join(text_parts)
         
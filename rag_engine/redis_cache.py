@@ -0,0 +1,18 @@
+import redis
+from typing import Optional
+from config import REDIS_URL
+
+# Shared cache across uvicorn workers and restarts. Disabled when REDIS_URL is unset.
+
+_redis_client = None
+
+def get_redis() -> Optional[redis.Redis]:
+    """
+    Get or create a singleton Redis client, or None if Redis isn't configured.
+    """
+    global _redis_client
+    if not REDIS_URL:
+        return None
+    if _redis_client is None:
+        _redis_client = redis.Redis.from_url(REDIS_URL, socket_timeout=0.5)
+    return _redis_client
@@ -1,19 +1,216 @@
-from qdrant_client import QdrantClient
+from qdrant_client import QdrantClient, AsyncQdrantClient
 from qdrant_client.http import models
-from qdrant_client.http.models import Distance, VectorParams, PointStruct
-from typing import List, Dict, Optional
+from qdrant_client.http.models import Distance, VectorParams
+from qdrant_client.http.exceptions import ResponseHandlingException, UnexpectedResponse
+from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception
+import grpc
+import httpx
+import numpy as np
+from typing import List, Dict, Iterator, Optional, Tuple
+import asyncio
+import logging
 import uuid
-from config import QDRANT_URL, QDRANT_API_KEY, COLLECTION_NAME, VECTOR_SIZE
-from .embedder import get_embedder
-from .chunker import chunk_text
+import os
+import random
+import time
+import threading
+import queue
+from itertools import islice
+from contextlib import contextmanager
+import concurrent.futures
+from concurrent.futures import ThreadPoolExecutor
+from config import QDRANT_URL, QDRANT_API_KEY, QDRANT_PREFER_GRPC, QDRANT_GRPC_PORT, COLLECTION_NAME, VECTOR_SIZE, QUANTIZATION, VECTORS_ON_DISK, TEXT_STORE_DB, TEXT_PREVIEW_LENGTH, EMBED_BATCH_SIZE, CHUNK_SIZE
+from .embedder import get_embedder, invalidate_query_cache, query_cache_info
+from .chunker import chunk_document
+from .text_store import put_texts, get_texts
+from .embedding_cache import get_cached_embeddings, store_embeddings
+from .url_cache import clear_url_states
 
-# Initialize Qdrant client with longer timeout
-qdrant_client = QdrantClient(
+logger = logging.getLogger(__name__)
+
+# Embedder bound on first use so ingest and search skip the get_embedder() lookup
+_EMBEDDER = None
+
+def _embedder():
+    """
+    Return the shared embedder, binding it the first time it is needed.
+    """
+    global _EMBEDDER
+    if _EMBEDDER is None:
+        _EMBEDDER = get_embedder()
+    return _EMBEDDER
+
+# Connection settings shared by the sync client and the per-ingest async clients
+QDRANT_CLIENT_OPTIONS = dict(
     url=QDRANT_URL,
     api_key=QDRANT_API_KEY if QDRANT_API_KEY else None,
+    prefer_grpc=QDRANT_PREFER_GRPC,  # Binary protobuf vectors instead of JSON text
+    grpc_port=QDRANT_GRPC_PORT,
+    # Keep the single HTTP/2 channel alive between requests
+    grpc_options={
+        "grpc.keepalive_time_ms": 10000,
+        "grpc.keepalive_timeout_ms": 5000,
+        "grpc.http2.max_pings_without_data": 0
+    },
+    # REST fallback: reuse pooled keep-alive connections (passed through to httpx)
+    limits=httpx.Limits(max_keepalive_connections=20, max_connections=40),
     timeout=60  # ADD THIS - Increase to 60 seconds
 )
 
+# Initialize Qdrant client with longer timeout
+qdrant_client = QdrantClient(**QDRANT_CLIENT_OPTIONS)
+
+
+def get_quantization_config():
+    """
+    Build the Qdrant quantization config selected by QUANTIZATION.
+    
+    Returns:
+        Scalar (int8, 4x smaller) or binary (32x smaller) config, or None
+    """
+    if QUANTIZATION == "scalar":
+        return models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8,
+                quantile=0.99,
+                always_ram=True
+            )
+        )
+    if QUANTIZATION == "binary":
+        return models.BinaryQuantization(
+            binary=models.BinaryQuantizationConfig(always_ram=True)
+        )
+    return None
+
+def get_search_params():
+    """
+    Search params that rescore quantized candidates with the original vectors.
+    """
+    if QUANTIZATION not in ("scalar", "binary"):
+        return None
+    
+    return models.SearchParams(
+        quantization=models.QuantizationSearchParams(
+            rescore=True,
+            oversampling=2.0
+        )
+    )
+
+# Ingests at least this large pause HNSW indexing until the upload finishes
+BULK_INGEST_MIN_POINTS = 1000
+DEFAULT_INDEXING_THRESHOLD = 20000
+
+_bulk_lock = threading.Lock()
+_bulk_active = 0
+_saved_indexing_threshold = None
+
+def _pause_indexing(num_points: int) -> bool:
+    """
+    Disable HNSW indexing ahead of a large upload.
+    
+    Overlapping bulk ingests share one pause; see _resume_indexing.
+    
+    Args:
+        num_points: Number of points about to be uploaded
+    
+    Returns:
+        True if a pause was taken (the caller must call _resume_indexing)
+    """
+    global _bulk_active, _saved_indexing_threshold
+    
+    if num_points < BULK_INGEST_MIN_POINTS:
+        return False
+    
+    with _bulk_lock:
+        if _bulk_active == 0:
+            optimizer_config = qdrant_client.get_collection(COLLECTION_NAME).config.optimizer_config
+            _saved_indexing_threshold = optimizer_config.indexing_threshold or DEFAULT_INDEXING_THRESHOLD
+            qdrant_client.update_collection(
+                collection_name=COLLECTION_NAME,
+                optimizers_config=models.OptimizersConfigDiff(indexing_threshold=0)
+            )
+            logger.info("⏸️ Paused indexing for bulk ingest of %d points", num_points)
+        _bulk_active += 1
+    return True
+
+def _resume_indexing():
+    """
+    Release a pause taken by _pause_indexing; the last one out restores the threshold.
+    """
+    global _bulk_active
+    
+    with _bulk_lock:
+        _bulk_active -= 1
+        if _bulk_active == 0:
+            qdrant_client.update_collection(
+                collection_name=COLLECTION_NAME,
+                optimizers_config=models.OptimizersConfigDiff(indexing_threshold=_saved_indexing_threshold)
+            )
+            logger.info("▶️ Restored indexing threshold to %s", _saved_indexing_threshold)
+
+_stale_pause_checked = False
+
+def _restore_stale_indexing_pause(indexing_threshold: Optional[int]):
+    """
+    Undo an indexing pause left behind by a process killed mid bulk ingest.
+    
+    The finally in bulk_ingest can't run on SIGKILL / OOM, which would leave
+    indexing_threshold=0 (no HNSW rebuild) for good. Checked once per process,
+    before this process has started any ingest of its own.
+    """
+    global _stale_pause_checked
+    
+    with _bulk_lock:
+        if _stale_pause_checked:
+            return
+        _stale_pause_checked = True
+        
+        if indexing_threshold == 0 and _bulk_active == 0:
+            qdrant_client.update_collection(
+                collection_name=COLLECTION_NAME,
+                optimizers_config=models.OptimizersConfigDiff(indexing_threshold=DEFAULT_INDEXING_THRESHOLD)
+            )
+            logger.warning("⚠️ Found indexing paused by an interrupted bulk ingest; restored threshold to %d", DEFAULT_INDEXING_THRESHOLD)
+
+@contextmanager
+def bulk_ingest(num_points: int):
+    """
+    Disable HNSW indexing while a large upload runs, then restore it.
+    
+    Overlapping bulk ingests share one pause; the threshold is restored when
+    the last of them finishes, even if the upload raised.
+    
+    Args:
+        num_points: Number of points about to be uploaded
+    """
+    paused = _pause_indexing(num_points)
+    try:
+        yield
+    finally:
+        if paused:
+            _resume_indexing()
+
+# Payload fields used in filters get an index; everything else stays unindexed on disk
+PAYLOAD_INDEXES = {
+    "source": models.PayloadSchemaType.KEYWORD
+}
+
+def create_payload_indexes(existing: Optional[Dict] = None):
+    """
+    Create indexes for filterable payload fields that don't have one yet.
+    
+    Args:
+        existing: Current payload schema of the collection (field -> info)
+    """
+    for field_name, field_schema in PAYLOAD_INDEXES.items():
+        if existing and field_name in existing:
+            continue
+        qdrant_client.create_payload_index(
+            collection_name=COLLECTION_NAME,
+            field_name=field_name,
+            field_schema=field_schema
+        )
+        logger.info("✅ Indexed payload field '%s'", field_name)
 
 def init_collection():
     """
@@ -25,23 +222,155 @@ def init_collection():
         collection_names = [c.name for c in collections]
         
         if COLLECTION_NAME in collection_names:
-            print(f"✅ Collection '{COLLECTION_NAME}' already exists")
+            logger.info("✅ Collection '%s' already exists", COLLECTION_NAME)
+            
+            collection_info = qdrant_client.get_collection(COLLECTION_NAME)
+            
+            # Collections created before quantization was enabled get it in place
+            quantization_config = get_quantization_config()
+            if quantization_config is not None and collection_info.config.quantization_config is None:
+                qdrant_client.update_collection(
+                    collection_name=COLLECTION_NAME,
+                    quantization_config=quantization_config
+                )
+                logger.info("✅ Enabled %s quantization on '%s'", QUANTIZATION, COLLECTION_NAME)
+            
+            create_payload_indexes(existing=collection_info.payload_schema or {})
+            _restore_stale_indexing_pause(collection_info.config.optimizer_config.indexing_threshold)
             return
         
+        # Fresh index - drop any query vectors cached against the old one, and
+        # forget page states so the updater doesn't skip pages that are no longer stored
+        invalidate_query_cache()
+        clear_url_states()
+        
         # Create new collection
         qdrant_client.create_collection(
             collection_name=COLLECTION_NAME,
             vectors_config=VectorParams(
                 size=VECTOR_SIZE,
-                distance=Distance.COSINE
-            )
+                distance=Distance.DOT,  # Vectors are unit-normalized, so DOT == cosine
+                on_disk=VECTORS_ON_DISK  # Originals only needed for rescoring; quantized copies stay in RAM
+            ),
+            quantization_config=get_quantization_config(),
+            on_disk_payload=True  # Payloads are read only for the top-k hits
         )
-        print(f"✅ Created collection '{COLLECTION_NAME}'")
+        create_payload_indexes()
+        logger.info("✅ Created collection '%s' (quantization: %s)", COLLECTION_NAME, QUANTIZATION)
         
     except Exception as e:
-        print(f"❌ Error initializing collection: {e}")
+        logger.error("❌ Error initializing collection: %s", e)
         raise
 
+def _knowledge_base_changed():
+    """
+    Drop cached answers after points were added or removed.
+    """
+    # Imported here: answer_cache uses this module's qdrant_client
+    from .answer_cache import invalidate_answers
+    invalidate_answers()
+
+# Maximum concurrent upsert requests per ingest
+UPLOAD_CONCURRENCY = 4
+
+# gRPC statuses worth retrying: server overloaded, busy or slow to answer.
+# Anything else (INVALID_ARGUMENT, UNAUTHENTICATED, NOT_FOUND, ...) won't fix itself.
+RETRYABLE_GRPC_CODES = {
+    grpc.StatusCode.UNAVAILABLE,
+    grpc.StatusCode.DEADLINE_EXCEEDED,
+    grpc.StatusCode.RESOURCE_EXHAUSTED
+}
+
+# REST statuses worth retrying
+RETRYABLE_HTTP_STATUSES = {429, 502, 503, 504}
+
+def _is_connection_refused(e: Exception) -> bool:
+    """
+    True if Qdrant isn't listening at all (no point retrying or splitting).
+    """
+    if isinstance(e, grpc.RpcError):
+        details = (e.details() or "").lower()
+        return "connection refused" in details or "failed to connect" in details
+    if isinstance(e, ResponseHandlingException):
+        return isinstance(e.source, httpx.ConnectError)
+    return False
+
+def _is_retryable(e: BaseException) -> bool:
+    """
+    Transient failures worth retrying with backoff.
+    """
+    if _is_connection_refused(e):
+        return False
+    if isinstance(e, grpc.RpcError):
+        return e.code() in RETRYABLE_GRPC_CODES
+    if isinstance(e, UnexpectedResponse):
+        return e.status_code in RETRYABLE_HTTP_STATUSES
+    return isinstance(e, (ResponseHandlingException, TimeoutError))
+
+def _should_split(e: Exception) -> bool:
+    """
+    True if a smaller request could succeed: the batch timed out or was too large.
+    """
+    if _is_connection_refused(e):
+        return False
+    if isinstance(e, grpc.RpcError):
+        return e.code() in (grpc.StatusCode.DEADLINE_EXCEEDED, grpc.StatusCode.RESOURCE_EXHAUSTED)
+    if isinstance(e, UnexpectedResponse):
+        return e.status_code == 413
+    if isinstance(e, ResponseHandlingException):
+        return isinstance(e.source, httpx.TimeoutException)
+    return isinstance(e, TimeoutError)
+
+# Retry policy shared by every upsert path
+_upsert_retry = retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=0.5, max=8),
+    retry=retry_if_exception(_is_retryable),
+    reraise=True
+)
+
+@_upsert_retry
+def _upsert_with_retry(points: models.Batch, wait: bool):
+    """
+    Upsert a batch, retrying transient failures with exponential backoff.
+    """
+    qdrant_client.upsert(
+        collection_name=COLLECTION_NAME,
+        points=points,
+        wait=wait
+    )
+
+def _split_batch(points: models.Batch) -> Tuple[models.Batch, models.Batch]:
+    """
+    Split a batch into two halves.
+    """
+    half = len(points.ids) // 2
+    return (
+        models.Batch(ids=points.ids[:half], vectors=points.vectors[:half], payloads=points.payloads[:half]),
+        models.Batch(ids=points.ids[half:], vectors=points.vectors[half:], payloads=points.payloads[half:])
+    )
+
+def _upload_batch(points: models.Batch, wait: bool = False, split: bool = True):
+    """
+    Upsert one batch of points (runs in an upload worker thread).
+    
+    If the batch still times out (or is too large) after retries, it is split
+    in half once and each half is uploaded on its own. Other errors propagate.
+    """
+    # Small jitter so concurrent workers don't hit Qdrant in lockstep (avoids 429 bursts)
+    time.sleep(random.random() * 0.05)
+    
+    try:
+        _upsert_with_retry(points, wait)
+    except Exception as e:
+        if not split or len(points.ids) <= 1 or not _should_split(e):
+            raise
+        
+        first, second = _split_batch(points)
+        logger.warning("⚠️ Upsert of %d points failed (%s), retrying as two batches of ~%d", len(points.ids), e, len(first.ids))
+        _upload_batch(first, split=False)
+        _upload_batch(second, wait=wait, split=False)
+
 def add_document(text: str, metadata: Optional[Dict] = None, batch_size: int = 10) -> int:
     """
     Add a document to the vector database with batching support.
@@ -54,68 +383,413 @@ def add_document(text: str, metadata: Optional[Dict] = None, batch_size: int = 1
     Returns:
         Number of chunks added
     """
-    try:
-        # Chunk the text
-        chunks = chunk_text(text)
+    return add_documents([(text, metadata)], batch_size=batch_size)[0]
+
+# Embedded upload batches waiting for the uploader (bounds memory held in flight)
+UPLOAD_QUEUE_SIZE = 4
+
+_PIPELINE_DONE = object()
+
+def _iter_chunks(documents: List[Tuple[str, Optional[Dict]]], chunk_counts: List[int]) -> Iterator[Tuple[str, Dict]]:
+    """
+    Lazily chunk documents, yielding (chunk, payload) pairs.
+    
+    Fills chunk_counts[i] with the number of chunks of document i as it goes.
+    """
+    for doc_index, (text, metadata) in enumerate(documents):
+        chunks = chunk_document(text)
         
         if not chunks:
-            print("⚠️ No chunks generated from text")
-            return 0
+            logger.warning("⚠️ No chunks generated from text")
         
-        print(f"📝 Generated {len(chunks)} chunks, uploading in batches of {batch_size}...")
+        chunk_counts[doc_index] = len(chunks)
+        for i, chunk in enumerate(chunks):
+            yield chunk, {
+                "chunk_index": i,
+                **(metadata or {})
+            }
+
+def _embed_with_cache(embedder, chunks: List[str]) -> Tuple[np.ndarray, int]:
+    """
+    Embed chunks, reusing cached embeddings of chunks we've seen before.
+    
+    Returns:
+        Tuple of (float32 array of vectors in input order, number of cache hits)
+    """
+    cached = get_cached_embeddings(chunks, embedder.cache_key)
+    miss_indices = [i for i, vector in enumerate(cached) if vector is None]
+    
+    vectors = np.empty((len(chunks), VECTOR_SIZE), dtype=np.float32)
+    for i, vector in enumerate(cached):
+        if vector is not None:
+            vectors[i] = vector
+    
+    if miss_indices:
+        # Repeated boilerplate (nav bars, footers) chunks identically across pages:
+        # embed each distinct text once, then fan the vector out to every position
+        unique_positions = {}
+        mapping = [unique_positions.setdefault(chunks[i], len(unique_positions)) for i in miss_indices]
+        unique_chunks = list(unique_positions)
         
-        # Get embedder
-        embedder = get_embedder()
+        unique_vectors = embedder.embed_array(unique_chunks)
+        store_embeddings(unique_chunks, unique_vectors, embedder.cache_key)
         
-        total_uploaded = 0
+        # Reassemble in original order
+        vectors[miss_indices] = unique_vectors[mapping]
+    
+    return vectors, len(chunks) - len(miss_indices)
+
+def _random_ids(n: int) -> List[str]:
+    """
+    Generate n random UUID4 point ids.
+    """
+    # One urandom call for all ids instead of a syscall per uuid4()
+    random_bytes = os.urandom(16 * n)
+    return [
+        str(uuid.UUID(bytes=random_bytes[i * 16:(i + 1) * 16], version=4))
+        for i in range(n)
+    ]
+
+def _embed_stage(
+    chunk_iter: Iterator[Tuple[str, Dict]],
+    upload_q: queue.Queue,
+    stop: threading.Event,
+    stats: Dict,
+    batch_size: int,
+    embed_batch_size: int
+):
+    """
+    Pipeline stage: pull chunks, embed them, and queue upload batches.
+    
+    Runs in its own thread. Ends by queueing _PIPELINE_DONE, or the exception
+    that stopped it. Returns early if the uploader sets `stop`.
+    """
+    def emit(item) -> bool:
+        while not stop.is_set():
+            try:
+                upload_q.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    try:
+        embedder = _embedder()
+        ids, payloads = [], []
+        vectors = np.empty((0, VECTOR_SIZE), dtype=np.float32)
         
-        # Process in batches
-        for batch_start in range(0, len(chunks), batch_size):
-            batch_end = min(batch_start + batch_size, len(chunks))
-            batch_chunks = chunks[batch_start:batch_end]
+        while True:
+            group = list(islice(chunk_iter, embed_batch_size))
+            if not group:
+                break
             
-            print(f"   Uploading batch {batch_start//batch_size + 1}/{(len(chunks)-1)//batch_size + 1} ({len(batch_chunks)} chunks)...")
+            chunks = [chunk for chunk, _ in group]
+            group_payloads = [payload for _, payload in group]
             
-            # Generate embeddings for this batch
-            vectors = embedder.embed_text(batch_chunks)
+            if TEXT_STORE_DB:
+                # Full texts live in the text store; Qdrant only keeps preview + hash
+                for payload, chunk, chunk_hash in zip(group_payloads, chunks, put_texts(chunks)):
+                    payload["preview"] = chunk[:TEXT_PREVIEW_LENGTH]
+                    payload["hash"] = chunk_hash
+            else:
+                for payload, chunk in zip(group_payloads, chunks):
+                    payload["text"] = chunk
             
-            # Create points for Qdrant
-            points = []
-            for i, (chunk, vector) in enumerate(zip(batch_chunks, vectors)):
-                point_id = str(uuid.uuid4())
-                
-                payload = {
-                    "text": chunk,
-                    "chunk_index": batch_start + i,
-                    **(metadata or {})
-                }
-                
-                points.append(
-                    PointStruct(
-                        id=point_id,
-                        vector=vector,
-                        payload=payload
-                    )
-                )
+            group_vectors, hits = _embed_with_cache(embedder, chunks)
+            stats["chunks"] += len(chunks)
+            stats["cache_hits"] += hits
             
-            # Upload this batch to Qdrant
-            qdrant_client.upsert(
-                collection_name=COLLECTION_NAME,
-                points=points,
-                wait=True  # Wait for completion before next batch
-            )
+            ids.extend(_random_ids(len(chunks)))
+            vectors = np.concatenate((vectors, group_vectors)) if len(vectors) else group_vectors
+            payloads.extend(group_payloads)
             
-            total_uploaded += len(batch_chunks)
-            print(f"   ✅ Batch uploaded ({total_uploaded}/{len(chunks)} total)")
+            # Hand off full columnar upload batches (one model per batch, not per point).
+            # Vectors stay one float32 block and are sliced as views; only the batch
+            # being sent is converted to Python lists.
+            while len(ids) >= batch_size:
+                batch = models.Batch(ids=ids[:batch_size], vectors=vectors[:batch_size].tolist(), payloads=payloads[:batch_size])
+                ids, vectors, payloads = ids[batch_size:], vectors[batch_size:], payloads[batch_size:]
+                if not emit(batch):
+                    return
         
-        print(f"✅ Added {len(chunks)} chunks to Qdrant")
-        return len(chunks)
+        if ids and not emit(models.Batch(ids=ids, vectors=vectors.tolist(), payloads=payloads)):
+            return
+        
+        emit(_PIPELINE_DONE)
         
     except Exception as e:
-        print(f"❌ Error adding document: {e}")
+        emit(e)
+
+def add_documents(
+    documents: List[Tuple[str, Optional[Dict]]],
+    batch_size: int = 512,
+    embed_batch_size: int = EMBED_BATCH_SIZE
+) -> List[int]:
+    """
+    Add several documents at once, embedding and uploading their chunks together.
+    
+    Chunks from all documents are pooled and streamed through a pipeline:
+    a worker thread chunks and embeds while this thread uploads finished
+    batches, so CPU embedding overlaps network upload. At most
+    UPLOAD_CONCURRENCY uploads are in flight and UPLOAD_QUEUE_SIZE batches
+    queued, so only a few batches are held in memory at a time.
+    
+    Args:
+        documents: List of (text, metadata) pairs
+        batch_size: Number of points per Qdrant upsert (default 512)
+        embed_batch_size: Number of chunks per embedding call (default EMBED_BATCH_SIZE)
+    
+    Returns:
+        Number of chunks added for each document, in input order
+    """
+    try:
+        chunk_counts = [0] * len(documents)
+        stats = {"chunks": 0, "cache_hits": 0}
+        
+        upload_q = queue.Queue(maxsize=UPLOAD_QUEUE_SIZE)
+        stop = threading.Event()
+        embed_thread = threading.Thread(
+            target=_embed_stage,
+            args=(_iter_chunks(documents, chunk_counts), upload_q, stop, stats, batch_size, embed_batch_size),
+            daemon=True
+        )
+        
+        # Chunk count isn't known until the pipeline has run; estimate it from text length
+        estimated_points = sum(len(text) for text, _ in documents) // CHUNK_SIZE
+        
+        logger.info("📝 Ingesting %d document(s), uploading in batches of %d with up to %d in flight...", len(documents), batch_size, UPLOAD_CONCURRENCY)
+        
+        embed_thread.start()
+        try:
+            with bulk_ingest(estimated_points):
+                last_batch = None
+                
+                with ThreadPoolExecutor(max_workers=UPLOAD_CONCURRENCY) as executor:
+                    pending = set()
+                    uploaded = 0
+                    try:
+                        while True:
+                            item = upload_q.get()
+                            if item is _PIPELINE_DONE:
+                                break
+                            if isinstance(item, Exception):
+                                raise item
+                            
+                            # Hold back the newest batch; everything before it uploads without waiting
+                            if last_batch is not None:
+                                # The executor's own work queue is unbounded: stop taking batches
+                                # while every upload slot is busy, so the embed stage blocks on upload_q
+                                if len(pending) >= UPLOAD_CONCURRENCY:
+                                    done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                                    for future in done:
+                                        future.result()
+                                
+                                pending.add(executor.submit(_upload_batch, last_batch))
+                                uploaded += 1
+                                logger.info("   Uploading batch %d (%d chunks)", uploaded, len(last_batch.ids))
+                            last_batch = item
+                        
+                        for future in pending:
+                            future.result()
+                    finally:
+                        for future in pending:
+                            future.cancel()
+                
+                # Final batch waits, so returning means every point is applied
+                if last_batch is not None:
+                    logger.info("   Uploading final batch (%d chunks)", len(last_batch.ids))
+                    _upload_batch(last_batch, wait=True)
+        finally:
+            stop.set()
+            embed_thread.join()
+            # Even a failed ingest may have applied some batches
+            if stats["chunks"]:
+                _knowledge_base_changed()
+        
+        if stats["chunks"]:
+            logger.info("   Embedding cache: %d hits, %d misses", stats["cache_hits"], stats["chunks"] - stats["cache_hits"])
+        logger.info("✅ Added %d chunks to Qdrant", stats["chunks"])
+        return chunk_counts
+        
+    except Exception as e:
+        logger.error("❌ Error adding documents: %s", e)
         raise
 
 
+# Maximum upload tasks alive at once in add_documents_async
+ASYNC_UPLOAD_CONCURRENCY = 5
+
+@_upsert_retry
+async def _upsert_async(client: AsyncQdrantClient, points: models.Batch, wait: bool):
+    """
+    Upsert a batch on the async client, retrying transient failures with exponential backoff.
+    """
+    await client.upsert(
+        collection_name=COLLECTION_NAME,
+        points=points,
+        wait=wait
+    )
+
+async def _upload_batch_async(client: AsyncQdrantClient, points: models.Batch, wait: bool = False, split: bool = True):
+    """
+    Async counterpart of _upload_batch: same jitter, retry policy and one-time split.
+    """
+    await asyncio.sleep(random.random() * 0.05)
+    
+    try:
+        await _upsert_async(client, points, wait)
+    except Exception as e:
+        if not split or len(points.ids) <= 1 or not _should_split(e):
+            raise
+        
+        first, second = _split_batch(points)
+        logger.warning("⚠️ Upsert of %d points failed (%s), retrying as two batches of ~%d", len(points.ids), e, len(first.ids))
+        await _upload_batch_async(client, first, split=False)
+        await _upload_batch_async(client, second, wait=wait, split=False)
+
+async def add_documents_async(
+    documents: List[Tuple[str, Optional[Dict]]],
+    batch_size: int = 512,
+    embed_batch_size: int = EMBED_BATCH_SIZE
+) -> List[int]:
+    """
+    Async version of add_documents for callers already on an event loop.
+    
+    Uses the same embed stage and bounded queue as add_documents, but uploads
+    on an AsyncQdrantClient from the event loop instead of a thread pool. At
+    most ASYNC_UPLOAD_CONCURRENCY upload tasks exist at a time, so memory stays
+    bounded just like the sync pipeline.
+    
+    Args:
+        documents: List of (text, metadata) pairs
+        batch_size: Number of points per Qdrant upsert (default 512)
+        embed_batch_size: Number of chunks per embedding call (default EMBED_BATCH_SIZE)
+    
+    Returns:
+        Number of chunks added for each document, in input order
+    """
+    try:
+        chunk_counts = [0] * len(documents)
+        stats = {"chunks": 0, "cache_hits": 0}
+        
+        upload_q = queue.Queue(maxsize=UPLOAD_QUEUE_SIZE)
+        stop = threading.Event()
+        embed_thread = threading.Thread(
+            target=_embed_stage,
+            args=(_iter_chunks(documents, chunk_counts), upload_q, stop, stats, batch_size, embed_batch_size),
+            daemon=True
+        )
+        
+        # Chunk count isn't known until the pipeline has run; estimate it from text length
+        estimated_points = sum(len(text) for text, _ in documents) // CHUNK_SIZE
+        
+        logger.info("📝 Ingesting %d document(s) async, uploading in batches of %d with up to %d in flight...", len(documents), batch_size, ASYNC_UPLOAD_CONCURRENCY)
+        
+        # gRPC channels belong to the loop that opened them, so each ingest gets its own client
+        client = AsyncQdrantClient(**QDRANT_CLIENT_OPTIONS)
+        pending = set()
+        
+        embed_thread.start()
+        try:
+            paused = await asyncio.to_thread(_pause_indexing, estimated_points)
+            try:
+                last_batch = None
+                uploaded = 0
+                
+                while True:
+                    item = await asyncio.to_thread(upload_q.get)
+                    if item is _PIPELINE_DONE:
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+                    
+                    # Hold back the newest batch; everything before it uploads without waiting
+                    if last_batch is not None:
+                        if len(pending) >= ASYNC_UPLOAD_CONCURRENCY:
+                            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                            for task in done:
+                                task.result()
+                        
+                        pending.add(asyncio.create_task(_upload_batch_async(client, last_batch)))
+                        uploaded += 1
+                        logger.info("   Uploading batch %d (%d chunks)", uploaded, len(last_batch.ids))
+                    last_batch = item
+                
+                await asyncio.gather(*pending)
+                
+                # Final batch waits, so returning means every point is applied
+                if last_batch is not None:
+                    logger.info("   Uploading final batch (%d chunks)", len(last_batch.ids))
+                    await _upload_batch_async(client, last_batch, wait=True)
+            finally:
+                for task in pending:
+                    task.cancel()
+                if paused:
+                    await asyncio.to_thread(_resume_indexing)
+        finally:
+            stop.set()
+            await asyncio.to_thread(embed_thread.join)
+            # Wake a queue read orphaned by cancellation (the stopped stage won't send anything)
+            try:
+                upload_q.put_nowait(_PIPELINE_DONE)
+            except queue.Full:
+                pass
+            await client.close()
+            # Even a failed ingest may have applied some batches
+            if stats["chunks"]:
+                await asyncio.to_thread(_knowledge_base_changed)
+        
+        if stats["chunks"]:
+            logger.info("   Embedding cache: %d hits, %d misses", stats["cache_hits"], stats["chunks"] - stats["cache_hits"])
+        logger.info("✅ Added %d chunks to Qdrant", stats["chunks"])
+        return chunk_counts
+        
+    except Exception as e:
+        logger.error("❌ Error adding documents: %s", e)
+        raise
+
+async def add_document_async(text: str, metadata: Optional[Dict] = None, batch_size: int = 512) -> int:
+    """
+    Async version of add_document.
+    
+    Args:
+        text: Document text
+        metadata: Optional metadata (source, timestamp, etc.)
+        batch_size: Number of chunks per upsert (default 512)
+    
+    Returns:
+        Number of chunks added
+    """
+    return (await add_documents_async([(text, metadata)], batch_size=batch_size))[0]
+
+def delete_documents_by_source(sources: List[str]):
+    """
+    Delete every point whose "source" is one of the given values.
+    
+    Used before re-ingesting a changed page so its old chunks don't linger
+    next to the new ones.
+    
+    Args:
+        sources: Source values (URLs, file names) to remove
+    """
+    if not sources:
+        return
+    
+    qdrant_client.delete(
+        collection_name=COLLECTION_NAME,
+        points_selector=models.FilterSelector(
+            filter=models.Filter(
+                must=[models.FieldCondition(key="source", match=models.MatchAny(any=sources))]
+            )
+        ),
+        wait=True
+    )
+    logger.info("🗑️ Removed old chunks for %d source(s)", len(sources))
+    _knowledge_base_changed()
+
+# Only the payload fields search results use ("text" unless the point was written with TEXT_STORE_DB)
+SEARCH_PAYLOAD_FIELDS = ["hash", "preview", "source", "text"]
+
 def search_documents(query: str, top_k: int = 5) -> List[Dict]:
     """
     Search for relevant documents using semantic search.
@@ -127,35 +801,76 @@ def search_documents(query: str, top_k: int = 5) -> List[Dict]:
     Returns:
         List of search results with text and metadata
     """
+    return search_documents_batch([query], top_k=top_k)[0]
+
+def search_documents_batch(queries: List[str], top_k: int = 5) -> List[List[Dict]]:
+    """
+    Search for several queries in a single Qdrant round-trip.
+    
+    Args:
+        queries: Search queries
+        top_k: Number of results to return per query
+    
+    Returns:
+        One list of search results (text and metadata) per query, in input order
+    """
     try:
         # Get embedder
-        embedder = get_embedder()
+        embedder = _embedder()
         
-        # Embed the query
-        query_vector = embedder.embed_query(query)
+        # Single queries go through the LRU-cached path; several are embedded in one batch
+        if len(queries) == 1:
+            query_vectors = [embedder.embed_query(queries[0])]
+        else:
+            query_vectors = embedder.embed_text(queries)
         
-        # Search Qdrant
-        search_results = qdrant_client.search(
+        # Search Qdrant - one request for all queries
+        search_params = get_search_params()
+        responses = qdrant_client.query_batch_points(
             collection_name=COLLECTION_NAME,
-            query_vector=query_vector,
-            limit=top_k
+            requests=[
+                models.QueryRequest(
+                    query=query_vector,
+                    limit=top_k,
+                    params=search_params,
+                    with_payload=SEARCH_PAYLOAD_FIELDS,
+                    with_vector=False
+                )
+                for query_vector in query_vectors
+            ]
         )
         
-        # Format results
-        results = []
-        for result in search_results:
-            results.append({
-                "text": result.payload.get("text", ""),
-                "score": result.score,
-                "source": result.payload.get("source", "unknown"),
-                "metadata": result.payload
-            })
+        # Points written with TEXT_STORE_DB set carry only a preview; fetch their full texts at once
+        hashes = [
+            point.payload["hash"]
+            for response in responses
+            for point in response.points
+            if "text" not in point.payload and "hash" in point.payload
+        ]
+        full_texts = get_texts(hashes) if hashes and TEXT_STORE_DB else {}
         
-        return results
+        missing = len(set(hashes) - full_texts.keys())
+        if missing:
+            logger.warning("⚠️ %d hit(s) not found in the text store (TEXT_STORE_DB=%s); answering from %d-character previews", missing, TEXT_STORE_DB, TEXT_PREVIEW_LENGTH)
+        
+        # Format results
+        return [
+            [
+                {
+                    "text": payload.get("text") or full_texts.get(payload.get("hash")) or payload.get("preview", ""),
+                    "score": result.score,
+                    "source": payload.get("source", "unknown"),
+                    "metadata": payload
+                }
+                for result in response.points
+                for payload in (result.payload,)
+            ]
+            for response in responses
+        ]
         
     except Exception as e:
-        print(f"❌ Error searching documents: {e}")
-        return []
+        logger.error("❌ Error searching documents: %s", e)
+        return [[] for _ in queries]
 
 def get_collection_info() -> Dict:
     """
@@ -167,6 +882,7 @@ def get_collection_info() -> Dict:
             "name": COLLECTION_NAME,
             "vectors_count": collection_info.vectors_count,
             "points_count": collection_info.points_count,
+            "query_embedding_cache": query_cache_info(),
             "status": "healthy"
         }
     except Exception as e:
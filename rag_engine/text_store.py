@@ -0,0 +1,71 @@
+import hashlib
+import sqlite3
+import threading
+from typing import Dict, Iterable, List
+from config import TEXT_STORE_DB
+
+# Content-addressed store for full chunk texts, used when TEXT_STORE_DB is set.
+# Qdrant payloads then only carry a short preview plus the hash, so search
+# results stay small on the wire. The file must live on persistent storage:
+# hits whose hash is missing here can only be answered from the preview.
+
+_local = threading.local()
+
+def _connect() -> sqlite3.Connection:
+    """
+    Get this thread's connection to the text store, creating the table if needed.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        # Wait out another process's write instead of failing with "database is locked"
+        conn = sqlite3.connect(TEXT_STORE_DB, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS chunk_texts (hash TEXT PRIMARY KEY, text TEXT)")
+        _local.conn = conn
+    return conn
+
+def text_hash(text: str) -> str:
+    """
+    Content hash used as the key for a chunk's text.
+    """
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+def put_texts(texts: Iterable[str]) -> List[str]:
+    """
+    Store chunk texts and return their hashes (in input order).
+    
+    Args:
+        texts: Chunk texts to store
+    
+    Returns:
+        Content hash of each text
+    """
+    rows = [(text_hash(text), text) for text in texts]
+    
+    conn = _connect()
+    with conn:
+        conn.executemany("INSERT OR IGNORE INTO chunk_texts (hash, text) VALUES (?, ?)", rows)
+    
+    return [h for h, _ in rows]
+
+def get_texts(hashes: List[str]) -> Dict[str, str]:
+    """
+    Fetch full chunk texts by hash.
+    
+    Args:
+        hashes: Content hashes to look up
+    
+    Returns:
+        Mapping of hash -> text for the hashes that were found
+    """
+    if not hashes:
+        return {}
+    
+    placeholders = ",".join("?" * len(hashes))
+    rows = _connect().execute(
+        f"SELECT hash, text FROM chunk_texts WHERE hash IN ({placeholders})",
+        hashes
+    ).fetchall()
+    
+    return dict(rows)
@@ -1,66 +1,173 @@
-import requests
-from bs4 import BeautifulSoup
-from typing import List, Dict
-from .retriever import add_document, init_collection
-import time
+import httpx
+import asyncio
+import hashlib
+from selectolax.parser import HTMLParser
+from typing import List, Dict, Optional
+from urllib.parse import urlparse
+from .retriever import add_documents_async, delete_documents_by_source, init_collection
+from .url_cache import get_url_states, save_url_states
 
-def fetch_page_text(url: str, timeout: int = 10) -> Dict[str, str]:
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+# Fetch retries: connection failures are retried by the transport, these
+# statuses by fetch_page_text_async (honouring Retry-After, capped)
+FETCH_RETRIES = 3
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRY_DELAY = 30
+
+_BLOCK_TAGS = {"p", "pre", "li"}
+
+def _has_block_ancestor(node) -> bool:
+    """
+    Check whether a node sits inside another p/pre/li element.
+    """
+    parent = node.parent
+    while parent is not None:
+        if parent.tag in _BLOCK_TAGS:
+            return True
+        parent = parent.parent
+    return False
+
+def parse_page_html(url: str, html: str) -> Dict[str, str]:
+    """
+    Extract title and readable text from a page's HTML.
+    
+    Args:
+        url: URL the HTML came from (used as fallback title)
+        html: Raw HTML content
+    
+    Returns:
+        Dictionary with 'url', 'text', and 'title'
+    """
+    # selectolax (lexbor, C) is ~20x faster than html.parser
+    tree = HTMLParser(html)
+    
+    # Remove script and style elements
+    for node in tree.css("script, style, nav, footer, header"):
+        node.decompose()
+    
+    # Get title
+    title_node = tree.css_first("title")
+    title = title_node.text(strip=True) if title_node else url
+    
+    # Extract text from paragraphs and code blocks
+    text_parts = []
+    seen = set()
+    
+    # Get paragraphs. Bare <code> is skipped since <pre> already wraps code
+    # blocks, and nested matches (a <p> inside an <li>) are covered by their parent.
+    for node in tree.css("p, pre, li"):
+        if _has_block_ancestor(node):
+            continue
+        
+        # Clean up excessive whitespace
+        text = " ".join(node.text().split())
+        if len(text) > 20 and text not in seen:  # Filter out very short snippets and repeats
+            seen.add(text)
+            text_parts.append(text)
+    
+    # If no paragraphs found, get all text
+    if not text_parts:
+        text_parts = [" ".join((tree.body.text() if tree.body else tree.text()).split())]
+    
+    # Keep blank lines between elements so the chunker can split on them
+    full_text = "\n\n".join(text_parts)
+    
+    print(f"✅ Fetched {len(full_text)} characters from {url}")
+    
+    return {
+        "url": url,
+        "text": full_text,
+        "title": title
+    }
+
+def _retry_delay(response: httpx.Response, attempt: int) -> float:
     """
-    Fetch and extract text content from a web page.
+    Seconds to wait before retrying a 429/5xx response.
+    
+    Uses the server's Retry-After (in seconds) when given, else exponential backoff.
+    """
+    retry_after = response.headers.get("retry-after", "")
+    if retry_after.isdigit():
+        return min(float(retry_after), MAX_RETRY_DELAY)
+    return min(0.5 * 2 ** attempt, MAX_RETRY_DELAY)
+
+async def fetch_page_text_async(
+    client: httpx.AsyncClient,
+    url: str,
+    sem: asyncio.Semaphore,
+    host_sems: Dict[str, asyncio.Semaphore],
+    state: Optional[Dict] = None,
+    timeout: int = 10
+) -> Dict[str, str]:
+    """
+    Fetch and extract text content from a web page, with bounded concurrency.
+    
+    429 and 5xx responses are retried up to FETCH_RETRIES times with backoff.
+    
+    When a previous state is given, sends a conditional GET and marks the page
+    "unchanged" on HTTP 304 or when the extracted text hashes the same.
     
     Args:
+        client: Shared async HTTP client
         url: URL of the page to scrape
+        sem: Global concurrency limit
+        host_sems: Per-host concurrency limits (politeness)
+        state: Stored etag / last_mod / content_hash from the last ingest
         timeout: Request timeout in seconds
     
     Returns:
-        Dictionary with 'url', 'text', and 'title'
+        Dictionary with 'url', 'text', 'title', validators and 'unchanged'
     """
     try:
-        print(f"🌐 Fetching: {url}")
+        host_sem = host_sems[urlparse(url).netloc]
         
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        
-        response = requests.get(url, timeout=timeout, headers=headers)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Remove script and style elements
-        for script in soup(["script", "style", "nav", "footer", "header"]):
-            script.decompose()
-        
-        # Get title
-        title = soup.title.string if soup.title else url
+        headers = dict(HEADERS)
+        if state:
+            if state.get("etag"):
+                headers["If-None-Match"] = state["etag"]
+            if state.get("last_mod"):
+                headers["If-Modified-Since"] = state["last_mod"]
         
-        # Extract text from paragraphs and code blocks
-        text_parts = []
+        # Wait for the host first so tasks queued on a busy host don't hold global slots
+        async with host_sem, sem:
+            print(f"🌐 Fetching: {url}")
+            for attempt in range(FETCH_RETRIES + 1):
+                response = await client.get(url, timeout=timeout, headers=headers)
+                if response.status_code not in RETRY_STATUSES or attempt == FETCH_RETRIES:
+                    break
+                
+                delay = _retry_delay(response, attempt)
+                print(f"⏳ {url} returned {response.status_code}, retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+            
+            if response.status_code == 304:
+                print(f"⏭️ Not modified: {url}")
+                return {
+                    "url": url,
+                    "text": "",
+                    "title": "",
+                    "unchanged": True
+                }
+            
+            response.raise_for_status()
         
-        # Get paragraphs
-        for p in soup.find_all(['p', 'pre', 'code', 'li']):
-            text = p.get_text().strip()
-            if text and len(text) > 20:  # Filter out very short snippets
-                text_parts.append(text)
+        # HTML parsing is CPU-bound, keep it off the event loop
+        page_data = await asyncio.to_thread(parse_page_html, url, response.text)
         
-        # If no paragraphs found, get all text
-        if not text_parts:
-            text_parts = [soup.get_text()]
+        page_data["etag"] = response.headers.get("etag")
+        page_data["last_mod"] = response.headers.get("last-modified")
+        page_data["content_hash"] = hashlib.sha256(page_data["text"].encode()).hexdigest()
+        page_data["unchanged"] = bool(state) and state.get("content_hash") == page_data["content_hash"]
         
-        full_text = "\n\n".join(text_parts)
+        if page_data["unchanged"]:
+            print(f"⏭️ Content unchanged: {url}")
         
-        # Clean up excessive whitespace
-        full_text = " ".join(full_text.split())
+        return page_data
         
-        print(f"✅ Fetched {len(full_text)} characters from {url}")
-        
-        return {
-            "url": url,
-            "text": full_text,
-            "title": title
-        }
-        
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         print(f"❌ Error fetching {url}: {e}")
         return {
             "url": url,
@@ -77,63 +184,127 @@ def fetch_page_text(url: str, timeout: int = 10) -> Dict[str, str]:
             "error": str(e)
         }
 
-def update_from_urls(urls: List[str], batch_delay: float = 1.0) -> Dict:
+async def update_from_urls_async(
+    urls: List[str],
+    max_concurrency: int = 5,
+    per_host_concurrency: int = 2,
+    force: bool = False
+) -> Dict:
     """
-    Scrape multiple URLs and add them to the knowledge base.
+    Scrape multiple URLs concurrently and add them to the knowledge base.
+    
+    Pages that haven't changed since their last successful ingest are skipped.
     
     Args:
         urls: List of URLs to scrape
-        batch_delay: Delay between requests (seconds) to be respectful
+        max_concurrency: Maximum number of requests in flight overall
+        per_host_concurrency: Maximum requests in flight per host (to be respectful)
+        force: Re-ingest every page even if it looks unchanged
     
     Returns:
         Summary of the update operation
     """
-    init_collection()
+    await asyncio.to_thread(init_collection)
     
     results = {
         "total_urls": len(urls),
         "successful": 0,
         "failed": 0,
+        "unchanged": 0,
         "total_chunks": 0,
         "details": []
     }
     
-    for i, url in enumerate(urls, 1):
-        print(f"\n📄 Processing {i}/{len(urls)}: {url}")
-        
-        # Fetch content
-        page_data = fetch_page_text(url)
+    states = {} if force else await asyncio.to_thread(get_url_states, urls)
+    
+    sem = asyncio.Semaphore(max_concurrency)
+    host_sems = {
+        host: asyncio.Semaphore(per_host_concurrency)
+        for host in {urlparse(url).netloc for url in urls}
+    }
+    
+    # Fetch phase: all pages concurrently
+    async with httpx.AsyncClient(
+        # Transport retries cover connect errors (refused, reset, DNS)
+        transport=httpx.AsyncHTTPTransport(
+            retries=FETCH_RETRIES,
+            limits=httpx.Limits(max_connections=max_concurrency)
+        ),
+        follow_redirects=True
+    ) as client:
+        pages = await asyncio.gather(
+            *[fetch_page_text_async(client, url, sem, host_sems, states.get(url)) for url in urls]
+        )
+    
+    # Ingest phase: pool every usable page into one batched embed + upsert
+    usable = [
+        page_data for page_data in pages
+        if not page_data.get("unchanged") and page_data["text"] and len(page_data["text"]) > 100
+    ]
+    documents = [
+        (
+            page_data["text"],
+            {
+                "source": page_data["url"],
+                "title": page_data["title"],
+                "type": "web_page"
+            }
+        )
+        for page_data in usable
+    ]
+    
+    chunk_counts = {}
+    ingest_error = None
+    
+    if documents:
+        try:
+            # Changed pages replace their old chunks instead of piling up next to them
+            await asyncio.to_thread(delete_documents_by_source, [page_data["url"] for page_data in usable])
+            
+            # Embedding runs in worker threads; upserts go out concurrently on this loop
+            counts = await add_documents_async(documents)
+            chunk_counts = {page_data["url"]: count for page_data, count in zip(usable, counts)}
+            
+            # Only remember validators once the content is safely in Qdrant
+            await asyncio.to_thread(save_url_states, usable)
+        except Exception as e:
+            print(f"❌ Error adding pages to database: {e}")
+            ingest_error = str(e)
+    
+    # Refresh validators for pages whose body hashed the same (ETag may have rotated)
+    refreshed = [page_data for page_data in pages if page_data.get("unchanged") and page_data.get("content_hash")]
+    await asyncio.to_thread(save_url_states, refreshed)
+    
+    for i, page_data in enumerate(pages, 1):
+        url = page_data["url"]
+        print(f"\n📄 Processed {i}/{len(urls)}: {url}")
         
-        if page_data["text"] and len(page_data["text"]) > 100:
-            try:
-                # Add to vector database
-                chunks_added = add_document(
-                    text=page_data["text"],
-                    metadata={
-                        "source": url,
-                        "title": page_data["title"],
-                        "type": "web_page"
-                    }
-                )
-                
-                results["successful"] += 1
-                results["total_chunks"] += chunks_added
-                results["details"].append({
-                    "url": url,
-                    "status": "success",
-                    "chunks": chunks_added
-                })
-                
-                print(f"✅ Added {chunks_added} chunks from {url}")
-                
-            except Exception as e:
-                print(f"❌ Error adding {url} to database: {e}")
-                results["failed"] += 1
-                results["details"].append({
-                    "url": url,
-                    "status": "failed",
-                    "error": str(e)
-                })
+        if page_data.get("unchanged"):
+            results["unchanged"] += 1
+            results["details"].append({
+                "url": url,
+                "status": "unchanged"
+            })
+            
+        elif url in chunk_counts:
+            chunks_added = chunk_counts[url]
+            results["successful"] += 1
+            results["total_chunks"] += chunks_added
+            results["details"].append({
+                "url": url,
+                "status": "success",
+                "chunks": chunks_added
+            })
+            
+            print(f"✅ Added {chunks_added} chunks from {url}")
+            
+        elif ingest_error and page_data in usable:
+            results["failed"] += 1
+            results["details"].append({
+                "url": url,
+                "status": "failed",
+                "error": ingest_error
+            })
         else:
             print(f"⚠️ Skipped {url} - insufficient content")
             results["failed"] += 1
@@ -142,21 +313,35 @@ def update_from_urls(urls: List[str], batch_delay: float = 1.0) -> Dict:
                 "status": "skipped",
                 "reason": "insufficient_content"
             })
-        
-        # Be respectful - delay between requests
-        if i < len(urls):
-            time.sleep(batch_delay)
     
     print(f"\n{'='*60}")
     print(f"📊 Update Summary:")
     print(f"   Total URLs: {results['total_urls']}")
     print(f"   ✅ Successful: {results['successful']}")
     print(f"   ❌ Failed: {results['failed']}")
+    print(f"   ⏭️ Unchanged: {results['unchanged']}")
     print(f"   📝 Total chunks added: {results['total_chunks']}")
     print(f"{'='*60}\n")
     
     return results
 
+def update_from_urls(urls: List[str], max_concurrency: int = 5, force: bool = False) -> Dict:
+    """
+    Scrape multiple URLs and add them to the knowledge base.
+    
+    Synchronous wrapper around update_from_urls_async for callers without
+    an event loop (scheduler jobs, threadpool endpoints).
+    
+    Args:
+        urls: List of URLs to scrape
+        max_concurrency: Maximum number of requests in flight overall
+        force: Re-ingest every page even if it looks unchanged
+    
+    Returns:
+        Summary of the update operation
+    """
+    return asyncio.run(update_from_urls_async(urls, max_concurrency=max_concurrency, force=force))
+
 def update_single_url(url: str) -> Dict:
     """
     Update knowledge base from a single URL.
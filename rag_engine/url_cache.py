@@ -0,0 +1,77 @@
+import sqlite3
+from typing import Dict, List
+from config import URL_CACHE_DB
+
+# ETag / Last-Modified / content hash of every successfully ingested page, so
+# the updater can skip pages that haven't changed. Only meaningful while the
+# collection still holds those pages: cleared when the collection is recreated.
+
+def _connect_url_cache() -> sqlite3.Connection:
+    """
+    Open the URL cache database, creating the table if needed.
+    """
+    conn = sqlite3.connect(URL_CACHE_DB)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS url_cache ("
+        "url TEXT PRIMARY KEY, etag TEXT, last_mod TEXT, content_hash TEXT)"
+    )
+    return conn
+
+def get_url_states(urls: List[str]) -> Dict[str, Dict]:
+    """
+    Look up the stored ETag, Last-Modified and content hash for URLs.
+    
+    Args:
+        urls: URLs to look up
+    
+    Returns:
+        Mapping of url -> {"etag", "last_mod", "content_hash"} for known URLs
+    """
+    if not urls:
+        return {}
+    
+    conn = _connect_url_cache()
+    try:
+        placeholders = ",".join("?" * len(urls))
+        rows = conn.execute(
+            f"SELECT url, etag, last_mod, content_hash FROM url_cache WHERE url IN ({placeholders})",
+            urls
+        ).fetchall()
+    finally:
+        conn.close()
+    
+    return {
+        url: {"etag": etag, "last_mod": last_mod, "content_hash": content_hash}
+        for url, etag, last_mod, content_hash in rows
+    }
+
+def save_url_states(pages: List[Dict]):
+    """
+    Persist validators and content hashes for successfully ingested pages.
+    
+    Args:
+        pages: Page dicts as returned by fetch_page_text_async
+    """
+    if not pages:
+        return
+    
+    conn = _connect_url_cache()
+    try:
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO url_cache (url, etag, last_mod, content_hash) VALUES (?, ?, ?, ?)",
+                [(p["url"], p.get("etag"), p.get("last_mod"), p.get("content_hash")) for p in pages]
+            )
+    finally:
+        conn.close()
+
+def clear_url_states():
+    """
+    Forget every stored page state, so the next update re-ingests all pages.
+    """
+    conn = _connect_url_cache()
+    try:
+        with conn:
+            conn.execute("DELETE FROM url_cache")
+    finally:
+        conn.close()
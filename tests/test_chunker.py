@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+
+from rag_engine import chunker
+from rag_engine.chunker import recursive_split, chunk_semantic
+
+
+PARAGRAPHS = [
+    "FastAPI is a modern web framework for building APIs with Python. It is based on standard type hints.",
+    "Path parameters are declared with the same syntax as Python format strings. Their values are passed to the function.",
+    "Dependencies are declared as function parameters. FastAPI resolves them for every request and caches them per request.",
+    "Background tasks run after the response is sent. They are useful for sending emails or processing uploaded files."
+]
+
+
+@pytest.mark.parametrize("chunk_size", [60, 120, 250])
+def test_recursive_split_respects_chunk_size(chunk_size):
+    text = "\n\n".join(PARAGRAPHS)
+    
+    chunks = recursive_split(text, chunk_size=chunk_size)
+    
+    assert chunks
+    assert all(len(chunk) <= chunk_size for chunk in chunks)
+
+
+@pytest.mark.parametrize("chunk_size", [60, 120, 250])
+def test_recursive_split_preserves_content(chunk_size):
+    text = "\n\n".join(PARAGRAPHS)
+    
+    chunks = recursive_split(text, chunk_size=chunk_size)
+    
+    assert " ".join(chunks).split() == text.split()
+
+
+def test_recursive_split_prefers_paragraph_boundaries():
+    text = "\n\n".join(PARAGRAPHS[:2])
+    
+    chunks = recursive_split(text, chunk_size=150)
+    
+    assert chunks == PARAGRAPHS[:2]
+
+
+def test_recursive_split_falls_back_to_finer_separators():
+    # One paragraph that's too long is split on sentence boundaries instead
+    chunks = recursive_split(PARAGRAPHS[1], chunk_size=80)
+    
+    assert chunks == [
+        "Path parameters are declared with the same syntax as Python format strings.",
+        "Their values are passed to the function."
+    ]
+
+
+def test_recursive_split_hard_splits_text_without_separators():
+    chunks = recursive_split("x" * 250, chunk_size=100)
+    
+    assert chunks == ["x" * 100, "x" * 100, "x" * 50]
+
+
+def test_recursive_split_short_and_empty_text():
+    assert recursive_split("  short text  ", chunk_size=100) == ["short text"]
+    assert recursive_split("   ", chunk_size=100) == []
+
+
+class TopicEmbedder:
+    """
+    Stub embedder: sentences about the same topic (first word) get the same unit vector.
+    """
+    
+    def __init__(self, topics):
+        self.topics = topics
+    
+    def embed_array(self, sentences):
+        vectors = np.zeros((len(sentences), len(self.topics)), dtype=np.float32)
+        for i, sentence in enumerate(sentences):
+            vectors[i, self.topics.index(sentence.split()[0])] = 1.0
+        return vectors
+
+
+def test_chunk_semantic_breaks_where_topic_changes(monkeypatch):
+    monkeypatch.setattr(chunker, "get_embedder", lambda: TopicEmbedder(["Cats", "Rust"]))
+    cats = "Cats sleep a lot. Cats purr when happy. Cats chase mice."
+    rust = "Rust has no garbage collector. Rust checks borrows at compile time."
+    
+    chunks = chunk_semantic(f"{cats} {rust}", chunk_size=80, percentile=5)
+    
+    assert chunks == [cats, rust]
+
+
+def test_chunk_semantic_merges_segments_that_fit(monkeypatch):
+    monkeypatch.setattr(chunker, "get_embedder", lambda: TopicEmbedder(["Cats", "Rust"]))
+    text = "Cats sleep. Cats purr. Rust compiles. Rust checks."
+    
+    chunks = chunk_semantic(text, chunk_size=200, percentile=5)
+    
+    assert chunks == [text]
+
+
+def test_chunk_semantic_splits_oversized_segments(monkeypatch):
+    monkeypatch.setattr(chunker, "get_embedder", lambda: TopicEmbedder(["Cats"]))
+    text = "Cats sleep a lot during the day. Cats purr when they are happy. Cats chase mice at night."
+    
+    chunks = chunk_semantic(text, chunk_size=40, percentile=5)
+    
+    assert all(len(chunk) <= 40 for chunk in chunks)
+    assert " ".join(chunks).split() == text.split()
@@ -0,0 +1,209 @@
+import asyncio
+
+import grpc
+import httpx
+import numpy as np
+import pytest
+from qdrant_client.http import models
+from qdrant_client.http.exceptions import UnexpectedResponse
+from tenacity import wait_none
+
+from config import VECTOR_SIZE
+from rag_engine import retriever
+from rag_engine.retriever import _embed_with_cache, _upload_batch, _upload_batch_async
+
+
+def _vector(value):
+    vector = np.zeros(VECTOR_SIZE, dtype=np.float32)
+    vector[0] = value
+    return vector
+
+
+class RecordingEmbedder:
+    """
+    Stub embedder: each text maps to a vector tagged with its length; records every call.
+    """
+    cache_key = "test:stub"
+    
+    def __init__(self):
+        self.calls = []
+    
+    def embed_array(self, texts):
+        self.calls.append(list(texts))
+        return np.stack([_vector(len(text)) for text in texts])
+
+
+def _use_cache(monkeypatch, cached):
+    stored = []
+    monkeypatch.setattr(
+        retriever, "get_cached_embeddings",
+        lambda texts, model: [cached.get(text) for text in texts]
+    )
+    monkeypatch.setattr(
+        retriever, "store_embeddings",
+        lambda texts, vectors, model: stored.append((list(texts), np.array(vectors)))
+    )
+    return stored
+
+
+def test_embed_with_cache_embeds_duplicates_once(monkeypatch):
+    stored = _use_cache(monkeypatch, {})
+    embedder = RecordingEmbedder()
+    chunks = ["footer", "intro text", "footer", "body", "intro text"]
+    
+    vectors, hits = _embed_with_cache(embedder, chunks)
+    
+    assert embedder.calls == [["footer", "intro text", "body"]]
+    assert [texts for texts, _ in stored] == [["footer", "intro text", "body"]]
+    assert hits == 0
+    # Every position gets the vector of its own text, in input order
+    assert vectors.shape == (5, VECTOR_SIZE)
+    assert vectors.dtype == np.float32
+    assert vectors[:, 0].tolist() == [len(chunk) for chunk in chunks]
+
+
+def test_embed_with_cache_mixes_hits_and_duplicate_misses(monkeypatch):
+    stored = _use_cache(monkeypatch, {"cached": _vector(-1)})
+    embedder = RecordingEmbedder()
+    chunks = ["new", "cached", "new", "other", "cached"]
+    
+    vectors, hits = _embed_with_cache(embedder, chunks)
+    
+    assert embedder.calls == [["new", "other"]]
+    assert [texts for texts, _ in stored] == [["new", "other"]]
+    assert hits == 2
+    assert vectors[:, 0].tolist() == [3, -1, 3, 5, -1]
+
+
+def test_embed_with_cache_all_hits_skips_embedder(monkeypatch):
+    stored = _use_cache(monkeypatch, {"a": _vector(1), "b": _vector(2)})
+    embedder = RecordingEmbedder()
+    
+    vectors, hits = _embed_with_cache(embedder, ["b", "a", "b"])
+    
+    assert embedder.calls == []
+    assert stored == []
+    assert hits == 3
+    assert vectors[:, 0].tolist() == [2, 1, 2]
+
+
+class FakeRpcError(grpc.RpcError):
+    def __init__(self, code, details=""):
+        self._code = code
+        self._details = details
+    
+    def code(self):
+        return self._code
+    
+    def details(self):
+        return self._details
+
+
+def _http_error(status_code):
+    return UnexpectedResponse(status_code=status_code, reason_phrase="", content=b"", headers=httpx.Headers())
+
+
+UNAVAILABLE = lambda: FakeRpcError(grpc.StatusCode.UNAVAILABLE, "server overloaded")
+INVALID_ARGUMENT = lambda: FakeRpcError(grpc.StatusCode.INVALID_ARGUMENT, "wrong vector dimension")
+CONNECTION_REFUSED = lambda: FakeRpcError(grpc.StatusCode.UNAVAILABLE, "failed to connect to all addresses; Connection refused")
+DEADLINE_EXCEEDED = lambda: FakeRpcError(grpc.StatusCode.DEADLINE_EXCEEDED, "Deadline Exceeded")
+
+
+class FakeQdrant:
+    """
+    Records every upsert as (batch size, wait) and raises whatever `fail` returns for it.
+    """
+    
+    def __init__(self, fail=lambda points, attempt: None):
+        self.fail = fail
+        self.calls = []
+    
+    def upsert(self, collection_name, points, wait):
+        self.calls.append((len(points.ids), wait))
+        error = self.fail(points, len(self.calls))
+        if error is not None:
+            raise error
+
+
+class FakeAsyncQdrant(FakeQdrant):
+    async def upsert(self, collection_name, points, wait):
+        FakeQdrant.upsert(self, collection_name, points, wait)
+
+
+def _batch(n):
+    return models.Batch(ids=list(range(n)), vectors=[[0.0] * VECTOR_SIZE] * n, payloads=[{}] * n)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(retriever._upsert_with_retry.retry, "wait", wait_none())
+    monkeypatch.setattr(retriever._upsert_async.retry, "wait", wait_none())
+
+
+def _use_client(monkeypatch, fail):
+    client = FakeQdrant(fail)
+    monkeypatch.setattr(retriever, "qdrant_client", client)
+    return client
+
+
+def test_upload_batch_retries_transient_errors(monkeypatch):
+    client = _use_client(monkeypatch, lambda points, attempt: UNAVAILABLE() if attempt < 3 else None)
+    
+    _upload_batch(_batch(8), wait=True)
+    
+    assert client.calls == [(8, True)] * 3
+
+
+@pytest.mark.parametrize("error", [UNAVAILABLE, lambda: _http_error(503)])
+def test_upload_batch_gives_up_after_three_attempts_without_splitting(monkeypatch, error):
+    client = _use_client(monkeypatch, lambda points, attempt: error())
+    
+    with pytest.raises(Exception):
+        _upload_batch(_batch(8))
+    
+    assert client.calls == [(8, False)] * 3
+
+
+@pytest.mark.parametrize("error", [INVALID_ARGUMENT, CONNECTION_REFUSED])
+def test_upload_batch_fails_fast_on_permanent_errors(monkeypatch, error):
+    client = _use_client(monkeypatch, lambda points, attempt: error())
+    
+    with pytest.raises(grpc.RpcError):
+        _upload_batch(_batch(8))
+    
+    assert client.calls == [(8, False)]
+
+
+def test_upload_batch_splits_oversized_batch_once(monkeypatch):
+    client = _use_client(monkeypatch, lambda points, attempt: _http_error(413) if len(points.ids) == 8 else None)
+    
+    _upload_batch(_batch(8), wait=True)
+    
+    # 413 isn't retried; only the second half waits
+    assert client.calls == [(8, True), (4, False), (4, True)]
+
+
+def test_upload_batch_never_splits_twice(monkeypatch):
+    client = _use_client(monkeypatch, lambda points, attempt: DEADLINE_EXCEEDED())
+    
+    with pytest.raises(grpc.RpcError):
+        _upload_batch(_batch(8), wait=True)
+    
+    assert client.calls == [(8, True)] * 3 + [(4, False)] * 3
+
+
+def test_upload_batch_async_matches_sync_policy(monkeypatch):
+    client = FakeAsyncQdrant(lambda points, attempt: DEADLINE_EXCEEDED() if len(points.ids) == 8 else None)
+    
+    asyncio.run(_upload_batch_async(client, _batch(8), wait=True))
+    
+    assert client.calls == [(8, True)] * 3 + [(4, False), (4, True)]
+
+
+def test_upload_batch_async_fails_fast_on_permanent_errors():
+    client = FakeAsyncQdrant(lambda points, attempt: INVALID_ARGUMENT())
+    
+    with pytest.raises(grpc.RpcError):
+        asyncio.run(_upload_batch_async(client, _batch(8)))
+    
+    assert client.calls == [(8, False)]
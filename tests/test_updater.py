@@ -0,0 +1,50 @@
+from rag_engine.updater import parse_page_html
+
+
+def test_parse_page_html_extracts_title_and_blocks():
+    html = """
+    <html><head><title>Tutorial</title></head><body>
+      <p>First paragraph with enough text to keep.</p>
+      <pre>def handler(): return {"ok": True}</pre>
+    </body></html>
+    """
+    
+    page = parse_page_html("https://example.com/", html)
+    
+    assert page["title"] == "Tutorial"
+    assert page["text"] == 'First paragraph with enough text to keep.\n\ndef handler(): return {"ok": True}'
+
+
+def test_parse_page_html_skips_blocks_nested_in_blocks():
+    html = """
+    <html><body><ul>
+      <li><p>Install the package with pip install fastapi.</p></li>
+      <li>Run the server with <pre>uvicorn main:app --reload</pre></li>
+    </ul></body></html>
+    """
+    
+    page = parse_page_html("https://example.com/", html)
+    
+    # Each <li> is kept once; the <p> / <pre> inside it isn't repeated
+    assert page["text"].split("\n\n") == [
+        "Install the package with pip install fastapi.",
+        "Run the server with uvicorn main:app --reload"
+    ]
+
+
+def test_parse_page_html_drops_repeated_and_boilerplate_text():
+    html = """
+    <html><body>
+      <nav><p>Home | Docs | Blog | About this site</p></nav>
+      <p>This paragraph appears twice on the page.</p>
+      <div><p>This paragraph appears twice on the page.</p></div>
+      <p>Too short</p>
+      <footer><p>Copyright 2024, all rights reserved.</p></footer>
+      <script>console.log("not content at all");</script>
+    </body></html>
+    """
+    
+    page = parse_page_html("https://example.com/", html)
+    
+    assert page["title"] == "https://example.com/"
+    assert page["text"] == "This paragraph appears twice on the page."